@@ -0,0 +1,42 @@
+import asyncio
+
+from sqlmodel import func, select
+
+from src.apps.accounts.models import BannedIps, KnownIps, User
+from src.db.db import get_session
+from src.db.redis import get_ip_index_versions, index_user_ips
+from src.utils.logger import LOGGER
+
+BATCH_SIZE = 500
+
+
+# Rebuild the Redis IP trust index for every user from Postgres
+async def backfill_ip_index():
+    async for session in get_session():
+        last_uid = None
+        total = 0
+        while True:
+            statement = select(User.uid).order_by(User.uid).limit(BATCH_SIZE)
+            if last_uid is not None:
+                statement = statement.where(User.uid > last_uid)
+
+            db_result = await session.exec(statement)
+            uids = db_result.all()
+            if not uids:
+                break
+
+            # Versions first, so users whose IPs change while their rows are read are left alone
+            versions = await get_ip_index_versions(uids)
+            known_ips = select(func.array_agg(KnownIps.ip)).where(KnownIps.userUid == User.uid).scalar_subquery()
+            banned_ips = select(func.array_agg(BannedIps.ip)).where(BannedIps.userUid == User.uid).scalar_subquery()
+            db_result = await session.exec(select(User.uid, known_ips, banned_ips).where(User.uid.in_(uids)))
+
+            await index_user_ips({uid: (allowed or [], banned or []) for uid, allowed, banned in db_result.all()}, versions)
+            last_uid = uids[-1]
+            total += len(uids)
+            LOGGER.info(f"Indexed IPs for {total} users")
+
+        LOGGER.info(f"IP trust index rebuilt for {total} users.")
+
+if __name__ == "__main__":
+    asyncio.run(backfill_ip_index())
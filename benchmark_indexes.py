@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config.settings import Config
+from src.utils.logger import LOGGER
+
+# Everything runs in a scratch schema so the benchmark never touches application tables
+SCHEMA = "bench_indexes"
+
+BENCH_TABLES = ["faqs", "analytics", "page_views", "known_ips"]
+
+TABLES = [
+    f"""CREATE TABLE {SCHEMA}.faqs (
+        uid uuid PRIMARY KEY DEFAULT gen_random_uuid(), question varchar NOT NULL, answer varchar NOT NULL,
+        domain varchar NOT NULL, "createdAt" timestamp
+    )""",
+    f"""CREATE TABLE {SCHEMA}.analytics (
+        uid uuid PRIMARY KEY DEFAULT gen_random_uuid(), pathname varchar NOT NULL, domain varchar NOT NULL,
+        "createdAt" timestamp
+    )""",
+    f"""CREATE TABLE {SCHEMA}.page_views (
+        uid uuid PRIMARY KEY DEFAULT gen_random_uuid(), ip varchar NOT NULL, "timeSpentInSeconds" integer NOT NULL,
+        date timestamp NOT NULL, "analyticsUid" uuid
+    )""",
+    f"""CREATE TABLE {SCHEMA}.known_ips (
+        uid uuid PRIMARY KEY DEFAULT gen_random_uuid(), ip varchar NOT NULL, "userUid" uuid
+    )""",
+]
+
+# Seeds scale with --scale: domains, users and timestamps are spread the way production data is
+SEEDS = [
+    f"""INSERT INTO {SCHEMA}.faqs (question, answer, domain, "createdAt")
+        SELECT 'question ' || i, 'answer ' || i, 'https://site-' || (i % 50) || '.example',
+               now() - (random() * interval '730 days')
+        FROM generate_series(1, 20000 * :scale) AS i""",
+    f"""INSERT INTO {SCHEMA}.analytics (pathname, domain, "createdAt")
+        SELECT '/page/' || (i % 500), 'https://site-' || (i % 50) || '.example',
+               now() - (random() * interval '365 days')
+        FROM generate_series(1, 200000 * :scale) AS i""",
+    f"""INSERT INTO {SCHEMA}.page_views (ip, "timeSpentInSeconds", date, "analyticsUid")
+        SELECT '10.0.' || (i % 256) || '.' || (i % 251), (random() * 600)::int,
+               now() - (random() * interval '365 days'), a.uid
+        FROM {SCHEMA}.analytics AS a, generate_series(1, 5) AS i""",
+    f"""INSERT INTO {SCHEMA}.known_ips (ip, "userUid")
+        SELECT '10.0.' || i || '.' || (random() * 253)::int, u.uid
+        FROM (SELECT gen_random_uuid() AS uid FROM generate_series(1, 20000 * :scale)) AS u,
+             generate_series(1, 4) AS i""",
+]
+
+INDEXES = [
+    f'CREATE INDEX ix_faqs_domain_created_at ON {SCHEMA}.faqs (domain, "createdAt")',
+    f'CREATE INDEX ix_analytics_domain_created_at ON {SCHEMA}.analytics (domain, "createdAt")',
+    f'CREATE INDEX ix_page_views_analytics_uid_date ON {SCHEMA}.page_views ("analyticsUid", date)',
+    f'CREATE INDEX ix_known_ips_user_uid_ip ON {SCHEMA}.known_ips ("userUid", ip)',
+]
+
+# Representative application queries, parameters picked from the seeded data
+QUERIES = {
+    "faqs by domain": (
+        f'SELECT * FROM {SCHEMA}.faqs WHERE domain = :domain ORDER BY "createdAt" DESC LIMIT 50',
+        "SELECT 'https://site-7.example' AS domain",
+    ),
+    "analytics by domain, last day": (
+        f"""SELECT * FROM {SCHEMA}.analytics WHERE domain = :domain
+            AND "createdAt" >= now() - interval '1 day' ORDER BY "createdAt" """,
+        "SELECT 'https://site-7.example' AS domain",
+    ),
+    "page views of one page": (
+        f'SELECT * FROM {SCHEMA}.page_views WHERE "analyticsUid" = :uid ORDER BY date',
+        f"SELECT uid FROM {SCHEMA}.analytics OFFSET 1000 LIMIT 1",
+    ),
+    "known ip for user": (
+        f'SELECT 1 FROM {SCHEMA}.known_ips WHERE "userUid" = :uid AND ip = :ip',
+        f'SELECT "userUid" AS uid, ip FROM {SCHEMA}.known_ips OFFSET 5000 LIMIT 1',
+    ),
+}
+
+
+async def measure(conn, sql: str, params: dict, runs: int) -> tuple[float, float, str]:
+    plan_rows = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params)
+    plan = "\n".join(row[0] for row in plan_rows)
+
+    timings = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        await conn.execute(text(sql), params)
+        timings.append((time.perf_counter() - started_at) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return statistics.median(timings), p95, plan
+
+
+async def run_queries(conn, runs: int, verbose: bool) -> dict:
+    results = {}
+    for name, (sql, params_sql) in QUERIES.items():
+        params = dict((await conn.execute(text(params_sql))).mappings().one())
+        p50, p95, plan = await measure(conn, sql, params, runs)
+        results[name] = (p50, p95)
+        LOGGER.info(f"{name}: p50={p50:.2f}ms p95={p95:.2f}ms | {plan.splitlines()[0].strip()}")
+        if verbose:
+            LOGGER.info(plan)
+    return results
+
+
+async def benchmark(database_url: str, scale: int, runs: int, verbose: bool, keep: bool):
+    engine = create_async_engine(database_url)
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        try:
+            for ddl in TABLES:
+                await conn.execute(text(ddl))
+
+            started_at = time.perf_counter()
+            for seed in SEEDS:
+                await conn.execute(text(seed), {"scale": scale})
+            await conn.execute(text(f"VACUUM ANALYZE {', '.join(f'{SCHEMA}.{table}' for table in BENCH_TABLES)}"))
+            LOGGER.info(f"Seeded in {time.perf_counter() - started_at:.1f}s")
+
+            LOGGER.info("Without indexes")
+            before = await run_queries(conn, runs, verbose)
+
+            for ddl in INDEXES:
+                await conn.execute(text(ddl))
+            await conn.execute(text(f"ANALYZE {', '.join(f'{SCHEMA}.{table}' for table in BENCH_TABLES)}"))
+
+            LOGGER.info("With indexes")
+            after = await run_queries(conn, runs, verbose)
+
+            for name in QUERIES:
+                speedup = before[name][0] / after[name][0] if after[name][0] else float("inf")
+                LOGGER.info(f"{name}: p50 {before[name][0]:.2f}ms -> {after[name][0]:.2f}ms ({speedup:.1f}x)")
+        finally:
+            if not keep:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare query plans and latency with and without the composite indexes.")
+    parser.add_argument("--database-url", default=Config.DATABASE_URL, help="Database to create the scratch schema in")
+    parser.add_argument("--scale", type=int, default=1, help="Multiplier for the seeded row counts")
+    parser.add_argument("--runs", type=int, default=50, help="Timed executions per query")
+    parser.add_argument("--verbose", action="store_true", help="Print the full EXPLAIN ANALYZE output")
+    parser.add_argument("--keep", action="store_true", help=f"Leave the {SCHEMA} schema behind for inspection")
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.database_url, args.scale, args.runs, args.verbose, args.keep))
@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config.settings import Config
+from src.utils.logger import LOGGER
+from src.utils.uuid7 import uuid7
+
+# Everything runs in a scratch schema so the benchmark never touches application tables
+SCHEMA = "bench_uuid7"
+
+GENERATORS = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+async def insert_rows(conn, table: str, generate, rows: int, batch_size: int) -> float:
+    statement = text(f"INSERT INTO {SCHEMA}.{table} (uid, ip, date) VALUES (:uid, :ip, now())")
+    started_at = time.perf_counter()
+    for start in range(0, rows, batch_size):
+        batch = [
+            {"uid": generate(), "ip": f"10.0.{i % 256}.{i % 251}"} for i in range(start, min(rows, start + batch_size))
+        ]
+        await conn.execute(statement, batch)
+    return time.perf_counter() - started_at
+
+
+async def benchmark(database_url: str, rows: int, batch_size: int, keep: bool):
+    engine = create_async_engine(database_url)
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        try:
+            for name, generate in GENERATORS.items():
+                table = f"page_views_{name}"
+                await conn.execute(text(
+                    f"CREATE TABLE {SCHEMA}.{table} (uid uuid PRIMARY KEY, ip varchar NOT NULL, date timestamp NOT NULL)"
+                ))
+                elapsed = await insert_rows(conn, table, generate, rows, batch_size)
+
+                index_size = (await conn.execute(
+                    text("SELECT pg_relation_size(:index)"), {"index": f"{SCHEMA}.{table}_pkey"}
+                )).scalar()
+                LOGGER.info(
+                    f"{name}: {rows / elapsed:,.0f} rows/s ({elapsed:.1f}s), "
+                    f"primary key index {index_size / 1024 / 1024:.1f} MiB ({index_size / rows:.1f} bytes/row)"
+                )
+        finally:
+            if not keep:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare insert throughput and primary key index size for UUIDv4 and UUIDv7 keys."
+    )
+    parser.add_argument("--database-url", default=Config.DATABASE_URL, help="Database to create the scratch schema in")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows inserted per key type")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT round trip")
+    parser.add_argument("--keep", action="store_true", help=f"Leave the {SCHEMA} schema behind for inspection")
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.database_url, args.rows, args.batch_size, args.keep))
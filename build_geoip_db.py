@@ -0,0 +1,17 @@
+import argparse
+
+from src.apps.accounts.geolocation import build_database
+from src.utils.logger import LOGGER
+
+# Build the memory-mapped GeoIP range database used when GEOIP_DATABASE_PATH is set
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert an IP range CSV into the GeoIP range database.")
+    parser.add_argument(
+        "csv_path",
+        help="CSV with start_ip,end_ip,city,region,country,country_code,country_calling_code,currency,in_eu",
+    )
+    parser.add_argument("output_path", help="Where to write the database file")
+    args = parser.parse_args()
+
+    count = build_database(args.csv_path, args.output_path)
+    LOGGER.info(f"Wrote {count} IP ranges to {args.output_path}")
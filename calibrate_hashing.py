@@ -0,0 +1,76 @@
+import argparse
+import statistics
+import time
+
+from src.config.settings import Config
+from src.utils.hashing import build_password_context
+from src.utils.logger import LOGGER
+
+BCRYPT_ROUNDS = range(10, 16)
+ARGON2_PARAMS = [
+    # (time_cost, memory_cost KiB, parallelism)
+    (2, 19456, 1),
+    (2, 47104, 1),
+    (3, 65536, 4),
+    (4, 65536, 4),
+    (3, 131072, 4),
+    (4, 262144, 4),
+]
+
+
+# Measure hash latency for one context and return (p50, p99) in milliseconds
+def measure(context, samples: int) -> tuple[float, float]:
+    timings = []
+    for i in range(samples):
+        started_at = time.perf_counter()
+        context.hash(f"calibration-password-{i}")
+        timings.append((time.perf_counter() - started_at) * 1000)
+    timings.sort()
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return statistics.median(timings), p99
+
+
+def calibrate(target_p99_ms: float, samples: int, schemes: list[str]):
+    results = []
+
+    if "bcrypt" in schemes:
+        for rounds in BCRYPT_ROUNDS:
+            context = build_password_context(["bcrypt"], rounds, 0, 0, 0)
+            p50, p99 = measure(context, samples)
+            LOGGER.info(f"bcrypt rounds={rounds}: p50={p50:.1f}ms p99={p99:.1f}ms")
+            results.append(("bcrypt", {"BCRYPT_ROUNDS": rounds}, p50, p99))
+            if p50 > target_p99_ms:
+                break
+
+    if "argon2" in schemes:
+        for time_cost, memory_cost, parallelism in ARGON2_PARAMS:
+            # bcrypt stays in the context for verification, so it needs valid rounds
+            context = build_password_context(["argon2"], Config.BCRYPT_ROUNDS, time_cost, memory_cost, parallelism)
+            p50, p99 = measure(context, samples)
+            LOGGER.info(
+                f"argon2 time_cost={time_cost} memory_cost={memory_cost} parallelism={parallelism}: "
+                f"p50={p50:.1f}ms p99={p99:.1f}ms"
+            )
+            params = {"ARGON2_TIME_COST": time_cost, "ARGON2_MEMORY_COST": memory_cost, "ARGON2_PARALLELISM": parallelism}
+            results.append(("argon2", params, p50, p99))
+            if p50 > target_p99_ms:
+                break
+
+    for scheme in schemes:
+        # The slowest (strongest) configuration that still fits the budget
+        fitting = [r for r in results if r[0] == scheme and r[3] <= target_p99_ms]
+        if not fitting:
+            LOGGER.warning(f"No {scheme} configuration fits a p99 of {target_p99_ms}ms on this host")
+            continue
+        _, params, p50, p99 = max(fitting, key=lambda r: r[3])
+        settings = " ".join(f"{k}={v}" for k, v in params.items())
+        LOGGER.info(f"Recommended for {scheme} (p50={p50:.1f}ms p99={p99:.1f}ms): {settings}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure password hash latency and recommend cost settings.")
+    parser.add_argument("--target-p99-ms", type=float, default=250.0, help="Latency budget for a single hash")
+    parser.add_argument("--samples", type=int, default=20, help="Hashes measured per configuration")
+    parser.add_argument("--schemes", nargs="+", default=["bcrypt", "argon2"], choices=["bcrypt", "argon2"])
+    args = parser.parse_args()
+    calibrate(args.target_p99_ms, args.samples, args.schemes)
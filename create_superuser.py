@@ -2,24 +2,21 @@ import asyncio
 from datetime import datetime
 import uuid
 from fastapi import Request
-from passlib.context import CryptContext
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 from src.apps.accounts.dependencies import get_ip_address, get_location
 from src.apps.accounts.models import KnownIps, User, VerifiedEmail
 from src.db.db import get_session
+from src.utils.hashing import generateHashKey
 from src.utils.logger import LOGGER
 
-# Password hashing setup
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Function to get user input asynchronously
 async def get_input(prompt: str) -> str:
     return await asyncio.to_thread(input, prompt)
 
 # Function to hash password asynchronously
 async def hash_password(password: str) -> str:
-    return await asyncio.to_thread(pwd_context.hash, password)
+    return await asyncio.to_thread(generateHashKey, password)
 
 async def create_superuser():
     async for session in get_session():
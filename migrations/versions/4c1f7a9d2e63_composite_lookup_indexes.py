@@ -0,0 +1,59 @@
+"""Composite indexes for domain-scoped and user-scoped lookups
+
+Revision ID: 4c1f7a9d2e63
+Revises: da7cec077908
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1f7a9d2e63'
+down_revision: Union[str, None] = 'da7cec077908'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_faqs_domain_created_at", "faqs", ["domain", "createdAt"]),
+    ("ix_testimonials_domain_created_at", "testimonials", ["domain", "createdAt"]),
+    ("ix_projects_domain_created_at", "projects", ["domain", "createdAt"]),
+    ("ix_services_domain_created_at", "services", ["domain", "createdAt"]),
+    ("ix_requested_services_domain_created_at", "requested_services", ["domain", "createdAt"]),
+    ("ix_analytics_domain_created_at", "analytics", ["domain", "createdAt"]),
+    ("ix_page_views_analytics_uid_date", "page_views", ["analyticsUid", "date"]),
+    ("ix_buttons_clicked_page_view_uid", "buttons_clicked", ["pageViewUid"]),
+    ("ix_known_ips_user_uid_ip", "known_ips", ["userUid", "ip"]),
+    ("ix_banned_ips_user_uid_ip", "banned_ips", ["userUid", "ip"]),
+    ("ix_cards_user_uid_card_number", "cards", ["userUid", "cardNumber"]),
+]
+
+
+def _is_invalid(name: str) -> bool:
+    return bool(op.get_bind().execute(
+        sa.text(
+            "SELECT NOT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND pg_catalog.pg_table_is_visible(c.oid)"
+        ),
+        {"name": name},
+    ).scalar())
+
+
+def upgrade() -> None:
+    # CONCURRENTLY builds without blocking writes but cannot run inside a transaction. A failed
+    # concurrent build leaves an INVALID index behind, which IF NOT EXISTS would keep, so drop those
+    # before retrying.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if _is_invalid(name):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
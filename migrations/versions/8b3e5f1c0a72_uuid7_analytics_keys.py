@@ -0,0 +1,53 @@
+"""Time-ordered UUIDv7 defaults for the analytics tables
+
+Revision ID: 8b3e5f1c0a72
+Revises: 4c1f7a9d2e63
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b3e5f1c0a72'
+down_revision: Union[str, None] = '4c1f7a9d2e63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ["analytics", "page_views", "buttons_clicked"]
+
+# Kept in step with src/utils/uuid7.py
+UUID_GENERATE_V7_SQL = """
+CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid AS $$
+    SELECT encode(
+        set_bit(
+            set_bit(
+                overlay(
+                    uuid_send(gen_random_uuid())
+                    PLACING substring(int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+                    FROM 1 FOR 6
+                ),
+                52, 1
+            ),
+            53, 1
+        ),
+        'hex'
+    )::uuid
+$$ LANGUAGE sql VOLATILE
+"""
+
+
+def upgrade() -> None:
+    # Existing rows keep their v4 keys; only new rows get time-ordered ones, so no rewrite is needed
+    op.execute(UUID_GENERATE_V7_SQL)
+    for table in TABLES:
+        op.alter_column(table, "uid", server_default=sa.text("uuid_generate_v7()"))
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.alter_column(table, "uid", server_default=None)
+    op.execute("DROP FUNCTION IF EXISTS uuid_generate_v7()")
@@ -0,0 +1,133 @@
+"""Partition page_views and buttons_clicked by month
+
+Revision ID: c2d94e7a61b5
+Revises: 8b3e5f1c0a72
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d94e7a61b5'
+down_revision: Union[str, None] = '8b3e5f1c0a72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_monthly_partitions(table: str, key: str) -> None:
+    # Cover every month that already holds rows, plus the next few
+    oldest = op.get_bind().execute(sa.text(f'SELECT min("{key}") FROM {table}_legacy')).scalar()
+    current = date.today().replace(day=1)
+    month = oldest.date().replace(day=1) if oldest is not None else current
+    while month <= add_months(current, MONTHS_AHEAD):
+        op.execute(
+            f"CREATE TABLE {table}_{month:%Y_%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+        month = add_months(month, 1)
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+
+def upgrade() -> None:
+    # buttons_clicked can no longer reference page_views.uid, which is only unique with the partition key
+    op.execute('ALTER TABLE buttons_clicked DROP CONSTRAINT IF EXISTS "buttons_clicked_pageViewUid_fkey"')
+
+    # Move the old tables aside, freeing their constraint and index names for the new ones
+    for table in ("page_views", "buttons_clicked"):
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+        op.execute(f"ALTER TABLE {table}_legacy RENAME CONSTRAINT {table}_pkey TO {table}_legacy_pkey")
+        op.execute(f"ALTER TABLE {table}_legacy DROP CONSTRAINT IF EXISTS {table}_uid_key")
+    op.execute("DROP INDEX IF EXISTS ix_page_views_analytics_uid_date")
+    op.execute("DROP INDEX IF EXISTS ix_buttons_clicked_page_view_uid")
+
+    op.execute(
+        """
+        CREATE TABLE page_views (
+            uid UUID NOT NULL DEFAULT uuid_generate_v7(),
+            ip VARCHAR NOT NULL,
+            "timeSpentInSeconds" INTEGER NOT NULL,
+            date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            "analyticsUid" UUID REFERENCES analytics (uid),
+            CONSTRAINT page_views_pkey PRIMARY KEY (uid, date)
+        ) PARTITION BY RANGE (date)
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE buttons_clicked (
+            uid UUID NOT NULL DEFAULT uuid_generate_v7(),
+            "buttonName" VARCHAR,
+            "pageViewUid" UUID,
+            "createdAt" TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            CONSTRAINT buttons_clicked_pkey PRIMARY KEY (uid, "createdAt")
+        ) PARTITION BY RANGE ("createdAt")
+        """
+    )
+    create_monthly_partitions("page_views", "date")
+    create_monthly_partitions("buttons_clicked", "createdAt")
+
+    op.execute('INSERT INTO page_views SELECT uid, ip, "timeSpentInSeconds", date, "analyticsUid" FROM page_views_legacy')
+    op.execute(
+        'INSERT INTO buttons_clicked SELECT uid, "buttonName", "pageViewUid", "createdAt" FROM buttons_clicked_legacy'
+    )
+
+    # Indexes on the parent cascade to every partition, current and future
+    op.execute('CREATE INDEX ix_page_views_analytics_uid_date ON page_views ("analyticsUid", date)')
+    op.execute('CREATE INDEX ix_buttons_clicked_page_view_uid ON buttons_clicked ("pageViewUid")')
+
+    op.execute("DROP TABLE buttons_clicked_legacy")
+    op.execute("DROP TABLE page_views_legacy")
+
+
+def downgrade() -> None:
+    for table in ("page_views", "buttons_clicked"):
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+        op.execute(f"ALTER TABLE {table}_partitioned RENAME CONSTRAINT {table}_pkey TO {table}_partitioned_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_page_views_analytics_uid_date")
+    op.execute("DROP INDEX IF EXISTS ix_buttons_clicked_page_view_uid")
+
+    op.execute(
+        """
+        CREATE TABLE page_views (
+            uid UUID NOT NULL DEFAULT uuid_generate_v7() PRIMARY KEY,
+            ip VARCHAR NOT NULL,
+            "timeSpentInSeconds" INTEGER NOT NULL,
+            date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            "analyticsUid" UUID REFERENCES analytics (uid)
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE buttons_clicked (
+            uid UUID NOT NULL DEFAULT uuid_generate_v7() PRIMARY KEY,
+            "buttonName" VARCHAR,
+            "pageViewUid" UUID REFERENCES page_views (uid),
+            "createdAt" TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )
+        """
+    )
+    op.execute(
+        'INSERT INTO page_views SELECT uid, ip, "timeSpentInSeconds", date, "analyticsUid" FROM page_views_partitioned'
+    )
+    op.execute(
+        'INSERT INTO buttons_clicked SELECT uid, "buttonName", "pageViewUid", "createdAt" FROM buttons_clicked_partitioned '
+        'WHERE "pageViewUid" IS NULL OR "pageViewUid" IN (SELECT uid FROM page_views)'
+    )
+    op.execute('CREATE INDEX ix_page_views_analytics_uid_date ON page_views ("analyticsUid", date)')
+    op.execute('CREATE INDEX ix_buttons_clicked_page_view_uid ON buttons_clicked ("pageViewUid")')
+
+    op.execute("DROP TABLE buttons_clicked_partitioned")
+    op.execute("DROP TABLE page_views_partitioned")
@@ -0,0 +1,55 @@
+"""Hourly and daily analytics rollup tables
+
+Revision ID: e5a0b83f4d19
+Revises: c2d94e7a61b5
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a0b83f4d19'
+down_revision: Union[str, None] = 'c2d94e7a61b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLLUP_TABLES = ["analytics_rollups_hourly", "analytics_rollups_daily"]
+
+
+def upgrade() -> None:
+    for table in ROLLUP_TABLES:
+        op.create_table(
+            table,
+            sa.Column('domain', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column('pathname', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column('bucket', postgresql.TIMESTAMP(), nullable=False),
+            sa.Column('views', sa.Integer(), nullable=False),
+            sa.Column('uniqueIps', sa.Integer(), nullable=False),
+            sa.Column('timeSpentSeconds', postgresql.BIGINT(), nullable=False),
+            sa.Column('buttonClicks', sa.Integer(), nullable=False),
+            sa.Column('buttons', postgresql.JSONB(), nullable=False),
+            sa.Column('updatedAt', postgresql.TIMESTAMP(), nullable=False),
+            sa.PrimaryKeyConstraint('domain', 'pathname', 'bucket'),
+        )
+        op.create_index(f'ix_{table}_domain_bucket', table, ['domain', 'bucket'])
+
+    op.create_table(
+        'analytics_rollup_state',
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('watermark', postgresql.UUID(), nullable=False),
+        sa.Column('updatedAt', postgresql.TIMESTAMP(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analytics_rollup_state')
+    for table in ROLLUP_TABLES:
+        op.drop_index(f'ix_{table}_domain_bucket', table_name=table)
+        op.drop_table(table)
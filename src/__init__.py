@@ -1,11 +1,15 @@
+import asyncio
 from contextlib import asynccontextmanager
 from collections import defaultdict
 
 from fastapi.responses import JSONResponse
 from pydantic_core import ValidationError
 
-from src.apps.accounts.dependencies import get_ip_address
-from src.db.db import init_db
+from src.apps.accounts.dependencies import get_ip_address, principal_cache
+from src.apps.accounts.geolocation import geo_resolver
+from src.db.db import close_db, init_db
+from src.db.redis import sync_jti_blocklist, sync_principal_invalidations
+from src.utils.hashing import password_hasher
 from src.utils.logger import LOGGER
 from src.errors import register_all_errors, BannedIp, InsufficientPermission, InvalidCredentials, ProxyConflict, UnknownIpConflict, UserAlreadyExists, UserBlocked, UserNotFound
 from src.middleware import register_middleware
@@ -17,6 +21,7 @@ from src.apps.testimonials.views import testimonial_router
 from src.apps.analytics.views import analysis_router
 from src.apps.projects.views import project_router
 from src.apps.requests.views import service_router, request_router
+from src.apps.monitoring.views import monitoring_router
 
 from fastapi import FastAPI, Request
 from fastapi_pagination import add_pagination
@@ -77,7 +82,14 @@ version_prefix = f"/{version}"
 async def life_span(app: FastAPI):
     LOGGER.info("Server is running")
     await init_db()
+    blocklist_sync = asyncio.create_task(sync_jti_blocklist())
+    principal_sync = asyncio.create_task(sync_principal_invalidations(principal_cache))
     yield
+    blocklist_sync.cancel()
+    principal_sync.cancel()
+    password_hasher.shutdown()
+    await geo_resolver.close()
+    await close_db()
     LOGGER.info("Server has stopped")
 
 
@@ -115,3 +127,4 @@ app.include_router(project_router, prefix=f"{version_prefix}/projects", tags=["p
 app.include_router(analysis_router, prefix=f"{version_prefix}/analytics", tags=["analytics"])
 app.include_router(service_router, prefix=f"{version_prefix}/services", tags=["services"])
 app.include_router(request_router, prefix=f"{version_prefix}/job-requests", tags=["job-requests"])
+app.include_router(monitoring_router, prefix=f"{version_prefix}/monitoring", tags=["monitoring"])
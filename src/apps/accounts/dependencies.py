@@ -1,9 +1,7 @@
 import uuid
-import aiohttp
-import requests
 from typing import Any, List, Annotated, Optional
 
-from sqlmodel import select
+from sqlmodel import func, select
 
 from fastapi import Depends, Request, status
 from fastapi.exceptions import HTTPException
@@ -11,19 +9,50 @@ from fastapi.security import HTTPBearer, OAuth2PasswordBearer, OAuth2PasswordReq
 from fastapi.security.http import HTTPAuthorizationCredentials
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.apps.accounts.geolocation import geo_resolver
 from src.apps.accounts.models import BannedIps, KnownIps, User
-from src.apps.accounts.schemas import LocationSchema
+from src.apps.accounts.schemas import LocationSchema, Principal
 from src.db.db import get_session
 from src.config.settings import Config
-from src.db.redis import token_in_blocklist
+from src.db.redis import (
+    get_ip_trust,
+    index_user_ips,
+    publish_principal_invalidation,
+    token_in_blocklist,
+    unindex_user_ips,
+)
+from src.utils.cache import LRUCache
 from src.errors import AccessTokenRequired, BannedIp, InsufficientPermission, InvalidToken, RefreshTokenRequired, UnknownIpConflict, UserBlocked, UserNotFound
-from src.utils.hashing import decode_token
+from src.utils.hashing import verify_token
 from src.utils.logger import LOGGER
 
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl=f"/{Config.VERSION}/auth/login")
 db_dependency = Annotated[AsyncSession, Depends(get_session)]
 oauth2_bearer_dependency = Annotated[str, Depends(oauth2_bearer)]
 
+# Authenticated callers keyed by user uid, invalidated by UserService whenever a user or their IPs change
+principal_cache: LRUCache[Principal] = LRUCache(maxsize=Config.PRINCIPAL_CACHE_SIZE, ttl=Config.PRINCIPAL_CACHE_TTL)
+
+
+async def invalidate_principal(uid: uuid.UUID) -> None:
+    """Drops the cached principal here and, through Redis pub/sub, in every other worker."""
+    principal_cache.invalidate(uid)
+    try:
+        await publish_principal_invalidation(uid)
+    except Exception as e:
+        LOGGER.warning(
+            f"Could not broadcast principal invalidation for {uid}, "
+            f"other workers keep it for up to {Config.PRINCIPAL_CACHE_TTL}s: {e}"
+        )
+
+
+async def invalidate_ip_index(uid: uuid.UUID) -> None:
+    """Drops a user's IP trust index after their IPs change in the database."""
+    try:
+        await unindex_user_ips(uid)
+    except Exception as e:
+        LOGGER.error(f"Could not drop the IP index of {uid}, it may stay stale for up to {Config.IP_INDEX_TTL}s: {e}")
+
 class TokenBearer(HTTPBearer):
     def __init__(self, auto_error=True):
         super().__init__(auto_error=auto_error)
@@ -33,17 +62,13 @@ class TokenBearer(HTTPBearer):
 
         token = creds.credentials
 
-        token_data = decode_token(token)
+        token_data = verify_token(token)
 
         if token_data is None:
             raise InvalidToken()
 
-        token_is_valid = self.token_valid(token)
         blocked = await token_in_blocklist(token_data["jti"])
 
-        if not token_is_valid:
-            raise InvalidToken()
-
         if blocked:
             raise InvalidToken()
 
@@ -52,7 +77,7 @@ class TokenBearer(HTTPBearer):
         return token_data
 
     def token_valid(self, token: oauth2_bearer_dependency) -> bool:  #str
-        token_data = decode_token(token)
+        token_data = verify_token(token)
         return token_data is not None
 
     def verify_token_data(self, token_data):
@@ -85,24 +110,7 @@ async def does_user_exist(email: Optional[str], uid: Optional[uuid.UUID], reques
     return user
 
 async def get_location(ip: str) -> LocationSchema:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f'https://ipapi.co/{ip}/json/') as response:
-            response_data = await response.json()
-
-    LOGGER.debug(response_data.get("in_eu"))
-
-    location_data = {
-        "ip": ip,
-        "city": response_data.get("city"),
-        "region": response_data.get("region"),
-        "country": response_data.get("country_name"),
-        "country_code": response_data.get("country_code"),
-        "country_calling_code": response_data.get("country_calling_code"),
-        "currency": response_data.get("currency"),
-        "in_eu": True if response_data.get("in_eu") == "true" else False,
-    }
-
-    return LocationSchema(**location_data)
+    return await geo_resolver.resolve(ip)
 
 def get_ip_address(request: Request):
     ip = request.headers.get("next-ip")
@@ -119,33 +127,86 @@ def get_ip_address(request: Request):
 async def does_ip_exist(user: User, request: Request, session: Annotated[AsyncSession, Depends(get_session)]):
     """
     This function checks if a given IP address exists in the database for a specific user.
+    The Redis IP trust index answers in one round trip; users that are not indexed yet are
+    read from the database once and indexed.
     """
     ip = get_ip_address(request)
 
-    db_result = await session.exec(select(KnownIps).where(KnownIps.userUid == user.uid).where(KnownIps.ip == ip))
-    new_ip = db_result.first()
+    try:
+        trust, version = await get_ip_trust(user.uid, ip)
+    except Exception as e:
+        LOGGER.warning(f"IP trust index unavailable, reading the IPs of {user.uid} from the database: {e}")
+        trust, version = None, None
+
+    if trust is None:
+        known_ips = select(func.array_agg(KnownIps.ip)).where(KnownIps.userUid == user.uid).scalar_subquery()
+        banned_ips = select(func.array_agg(BannedIps.ip)).where(BannedIps.userUid == user.uid).scalar_subquery()
+        db_result = await session.exec(select(known_ips, banned_ips))
+        allowed, banned = db_result.one()
+        allowed, banned = allowed or [], banned or []
+        if version is not None:
+            try:
+                await index_user_ips({user.uid: (allowed, banned)}, {user.uid: version})
+            except Exception as e:
+                LOGGER.warning(f"Could not index the IPs of {user.uid}: {e}")
+        trust = (ip in allowed, ip in banned)
+
+    known, banned = trust
+    LOGGER.debug(f"Does Ip Address Function: {ip} known={known} banned={banned}")
+
+    if not known:
+        raise UnknownIpConflict()
 
-    LOGGER.debug(f"Does Ip Address Function: {new_ip}")
+    if banned:
+        raise BannedIp()
 
-    if new_ip is None:
-        raise UnknownIpConflict()
+async def get_principal(uid: uuid.UUID, session: AsyncSession) -> Principal:
+    """
+    Returns the cached principal for a user, loading it with a single query (IPs aggregated into
+    arrays) on a miss so none of the `selectin` relationships on `User` are touched.
+    """
+    principal = principal_cache.get(uid)
+    if principal is not None:
+        return principal
+
+    known_ips = select(func.array_agg(KnownIps.ip)).where(KnownIps.userUid == User.uid).scalar_subquery()
+    banned_ips = select(func.array_agg(BannedIps.ip)).where(BannedIps.userUid == User.uid).scalar_subquery()
+    statement = select(
+        User.uid, User.email, User.companyName, User.isBlocked, User.isCompany, User.isSuperuser,
+        known_ips.label("knownIps"), banned_ips.label("bannedIps"),
+    ).where(User.uid == uid)
+
+    db_result = await session.exec(statement)
+    row = db_result.first()
+    if row is None:
+        raise UserNotFound()
 
-    banned_result = await session.exec(select(BannedIps).where(BannedIps.ip == ip).where(BannedIps.userUid == user.uid))
-    banned_ip = banned_result.first()
+    data = row._asdict()
+    data["knownIps"] = frozenset(data["knownIps"] or ())
+    data["bannedIps"] = frozenset(data["bannedIps"] or ())
+    principal = Principal(**data)
+    principal_cache.set(uid, principal)
+    return principal
+
+async def get_current_user(
+    token_details: Annotated[dict, Depends(AccessTokenBearer())],
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_session)],
+) -> Principal:
+    user_uid = uuid.UUID(token_details["user"]["user_uid"])
+    principal = await get_principal(user_uid, session)
 
-    if banned_ip is not None:
+    ip = get_ip_address(request)
+    if not principal.is_ip_known(ip):
+        raise UnknownIpConflict()
+    if principal.is_ip_banned(ip):
         raise BannedIp()
-    pass
 
-async def get_current_user(token_details: Annotated[dict, Depends(AccessTokenBearer())], request: Request, session: Annotated[AsyncSession, Depends(get_session)]) -> User:
-    user_email = token_details["user"]["email"]
-    user = await does_user_exist(user_email, None, request, session)
-
-    if user.isBlocked:
+    if principal.isBlocked:
         raise UserBlocked()
-    return user
+    return principal
 
-async def permission_check(current_user: Annotated[User, Depends(get_current_user)]) -> User:
+async def permission_check(current_user: Annotated[Principal, Depends(get_current_user)]) -> Principal:
     if not current_user.isCompany or not current_user.isSuperuser:
         raise InsufficientPermission()
     return current_user
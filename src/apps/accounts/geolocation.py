@@ -0,0 +1,208 @@
+import csv
+import ipaddress
+import json
+import mmap
+import os
+import struct
+import time
+from typing import List, Optional, Protocol
+
+import aiohttp
+
+from src.apps.accounts.schemas import LocationSchema
+from src.config.settings import Config
+from src.utils.cache import LRUCache
+from src.utils.logger import LOGGER
+
+# File layout: header, fixed-width records sorted by range start, then a JSON array of locations.
+# Every address is stored as 16 big-endian bytes (IPv4 is mapped into ::ffff:0:0/96) so IPv4 and
+# IPv6 ranges share a single sorted table.
+MAGIC = b"GEOIP01\0"
+HEADER = struct.Struct(">8sIQ")  # magic, record count, locations offset
+RECORD = struct.Struct(">16s16sI")  # range start, range end, location index
+
+
+def _ip_key(ip: str) -> bytes:
+    address = ipaddress.ip_address(ip)
+    if address.version == 4:
+        address = ipaddress.IPv6Address(f"::ffff:{address}")
+    return address.packed
+
+
+class GeoBackend(Protocol):
+    async def lookup(self, ip: str) -> Optional[LocationSchema]:
+        ...
+
+
+class IPRangeDatabase:
+    """A memory-mapped table of IP ranges queried by binary search."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, locations_offset = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a GeoIP range database")
+        self._locations = json.loads(self._mmap[locations_offset:])
+
+    def _record(self, index: int) -> tuple[bytes, bytes, int]:
+        return RECORD.unpack_from(self._mmap, HEADER.size + index * RECORD.size)
+
+    async def lookup(self, ip: str) -> Optional[LocationSchema]:
+        key = _ip_key(ip)
+
+        # Find the last range that starts at or before the address
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle)[0] <= key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == 0:
+            return None
+
+        _, end, location_index = self._record(low - 1)
+        if key > end:
+            return None
+        return LocationSchema(ip=ip, **self._locations[location_index])
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+
+class HttpGeoBackend:
+    """Looks addresses up on ipapi.co through one shared client session."""
+
+    def __init__(self, timeout: float = 3):
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def lookup(self, ip: str) -> Optional[LocationSchema]:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+
+        async with self._session.get(f'https://ipapi.co/{ip}/json/') as response:
+            # Rate limits and outages are failures, not "no location", so they must not be cached
+            response.raise_for_status()
+            response_data = await response.json()
+
+        if response_data.get("error"):
+            return None
+
+        return LocationSchema(
+            ip=ip,
+            city=response_data.get("city"),
+            region=response_data.get("region"),
+            country=response_data.get("country_name"),
+            country_code=response_data.get("country_code"),
+            country_calling_code=response_data.get("country_calling_code"),
+            currency=response_data.get("currency"),
+            in_eu=response_data.get("in_eu") in (True, "true"),
+        )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+
+class GeoIPResolver:
+    """
+    Resolves an IP to a location by asking each backend in turn, remembering results per IP. Private,
+    loopback and unparsable addresses are never looked up. When a backend fails and none finds the
+    address, the empty result is only remembered for `failure_ttl` seconds.
+    """
+
+    def __init__(self, backends: List[GeoBackend], cache_size: int = 10000, failure_ttl: float = 60):
+        self.backends = backends
+        self.failure_ttl = failure_ttl
+        self.cache: LRUCache[LocationSchema] = LRUCache(maxsize=cache_size)
+
+    async def resolve(self, ip: str) -> LocationSchema:
+        location = self.cache.get(ip)
+        if location is not None:
+            return location
+
+        location = LocationSchema(ip=ip)
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return location
+
+        failed = False
+        if address.is_global:
+            for backend in self.backends:
+                try:
+                    found = await backend.lookup(ip)
+                except Exception as e:
+                    LOGGER.warning(f"{type(backend).__name__} failed to locate {ip}: {e}")
+                    failed = True
+                    continue
+                if found is not None:
+                    location = found
+                    failed = False
+                    break
+
+        self.cache.set(ip, location, expires_at=time.time() + self.failure_ttl if failed else None)
+        return location
+
+    async def close(self) -> None:
+        for backend in self.backends:
+            if isinstance(backend, HttpGeoBackend):
+                await backend.close()
+            elif isinstance(backend, IPRangeDatabase):
+                backend.close()
+
+
+def build_database(csv_path: str, output_path: str) -> int:
+    """
+    Converts a CSV of `start_ip,end_ip,city,region,country,country_code,country_calling_code,currency,in_eu`
+    rows into the memory-mapped range format. Returns the number of ranges written.
+    """
+    locations: List[dict] = []
+    location_index: dict[str, int] = {}
+    records: List[tuple[bytes, bytes, int]] = []
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            location = {
+                "city": row.get("city") or None,
+                "region": row.get("region") or None,
+                "country": row.get("country") or None,
+                "country_code": row.get("country_code") or None,
+                "country_calling_code": row.get("country_calling_code") or None,
+                "currency": row.get("currency") or None,
+                "in_eu": (row.get("in_eu") or "").lower() in ("1", "true", "yes"),
+            }
+            location_key = json.dumps(location, sort_keys=True)
+            if location_key not in location_index:
+                location_index[location_key] = len(locations)
+                locations.append(location)
+            records.append((_ip_key(row["start_ip"]), _ip_key(row["end_ip"]), location_index[location_key]))
+
+    records.sort()
+    locations_offset = HEADER.size + len(records) * RECORD.size
+    with open(output_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(records), locations_offset))
+        for record in records:
+            f.write(RECORD.pack(*record))
+        f.write(json.dumps(locations).encode("utf-8"))
+
+    return len(records)
+
+
+def create_resolver() -> GeoIPResolver:
+    backends: List[GeoBackend] = []
+    if Config.GEOIP_DATABASE_PATH and os.path.exists(Config.GEOIP_DATABASE_PATH):
+        backends.append(IPRangeDatabase(Config.GEOIP_DATABASE_PATH))
+    elif Config.GEOIP_DATABASE_PATH:
+        LOGGER.warning(f"GeoIP database {Config.GEOIP_DATABASE_PATH} not found")
+
+    if Config.GEOIP_HTTP_FALLBACK:
+        backends.append(HttpGeoBackend())
+
+    return GeoIPResolver(backends, cache_size=Config.GEOIP_CACHE_SIZE, failure_ttl=Config.GEOIP_FAILURE_TTL)
+
+
+geo_resolver = create_resolver()
@@ -3,6 +3,7 @@ from decimal import Decimal
 from pydantic import AnyHttpUrl, EmailStr, FileUrl, IPvAnyAddress
 from pydantic_extra_types.payment import PaymentCardBrand, PaymentCardNumber
 from sqlmodel import SQLModel, Field, Relationship, Column
+from sqlalchemy import Index
 import sqlalchemy.dialects.postgresql as pg
 import uuid
 from typing import List, Optional
@@ -94,6 +95,7 @@ class User(SQLModel, table=True):
 
 class KnownIps(SQLModel, table=True):
     __tablename__ = "known_ips"
+    __table_args__ = (Index("ix_known_ips_user_uid_ip", "userUid", "ip"),)
 
     uid: uuid.UUID = Field(
         sa_column=Column(
@@ -112,6 +114,7 @@ class KnownIps(SQLModel, table=True):
 
 class BannedIps(SQLModel, table=True):
     __tablename__ = "banned_ips"
+    __table_args__ = (Index("ix_banned_ips_user_uid_ip", "userUid", "ip"),)
 
     uid: uuid.UUID = Field(
         sa_column=Column(
@@ -149,6 +152,7 @@ class VerifiedEmail(SQLModel, table=True):
 
 class Card(SQLModel, table=True):
     __tablename__ = "cards"
+    __table_args__ = (Index("ix_cards_user_uid_card_number", "userUid", "cardNumber"),)
 
     uid: uuid.UUID = Field(
         sa_column=Column(
@@ -24,6 +24,29 @@ class LocationSchema(BaseModel):
     in_eu: bool = False
 
 
+class Principal(BaseModel):
+    """The authenticated caller: just enough of a `User` to authorize a request."""
+    uid: uuid.UUID
+    email: EmailStr
+    companyName: Optional[str] = None
+
+    isBlocked: bool = False
+    isCompany: bool = False
+    isSuperuser: bool = False
+
+    knownIps: frozenset[str] = frozenset()
+    bannedIps: frozenset[str] = frozenset()
+
+    class Config:
+        from_attributes = True
+
+    def is_ip_known(self, ip: str) -> bool:
+        return ip in self.knownIps
+
+    def is_ip_banned(self, ip: str) -> bool:
+        return ip in self.bannedIps
+
+
 class AccessToken(BaseModel):
     message: str
     access_token: str
@@ -11,13 +11,19 @@ from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 # from src.app.auth.mails import send_card_pin, send_new_bank_account_details
-from src.apps.accounts.dependencies import does_ip_exist, get_ip_address, get_location
+from src.apps.accounts.dependencies import (
+    does_ip_exist,
+    get_ip_address,
+    get_location,
+    invalidate_ip_index,
+    invalidate_principal,
+)
 from src.apps.accounts.models import BannedIps, Card, KnownIps, User, VerifiedEmail
 from src.db.cloudinary import upload_image
 from src.db.db import get_session
 from src.db.redis import store_allowed_ip, store_verification_code
 from src.errors import InsufficientPermission, InvalidCredentials, PasswordsDoNotMatch, ProxyConflict, UnknownIpConflict, UserAlreadyExists, UserNotFound
-from src.utils.hashing import create_access_token, generate_verification_code, generateHashKey, verifyHashKey
+from src.utils.hashing import create_access_token, generate_verification_code, password_hasher
 from src.utils.logger import LOGGER
 from src.config.settings import Config
 
@@ -55,10 +61,15 @@ class UserService:
 
         await does_ip_exist(user, request, session)
 
-        valid_password = verifyHashKey(form_data.password, user.passwordHash)
+        valid_password, new_hash = await password_hasher.verify_and_update(form_data.password, user.passwordHash)
         if not valid_password:
             raise InvalidCredentials()
 
+        if new_hash is not None:
+            user.passwordHash = new_hash
+            await session.commit()
+            await session.refresh(user)
+
         return user
 
     async def register_new_user(self, permission: str, form_data: UserCreateOrLoginSchema, request: Request, session: AsyncSession):
@@ -79,7 +90,7 @@ class UserService:
 
         data_dict = form_data.model_dump()
         new_user = User(**data_dict)
-        new_user.passwordHash = generateHashKey(form_data.password)
+        new_user.passwordHash = await password_hasher.hash(form_data.password)
 
         # create permissions
         if permission == "company":
@@ -120,7 +131,7 @@ class UserService:
             image: Annotated[bytes, UploadFile] = user_data.pop("image")
 
             if password is not None:
-                user.passwordHash = generateHashKey(password)
+                user.passwordHash = await password_hasher.hash(password)
 
             # if image is not None:
             #     background_tasks.add_task(update_profile, image, session, user)
@@ -130,6 +141,7 @@ class UserService:
                     setattr(user, k, v)
 
         await session.commit()
+        await invalidate_principal(user.uid)
         await session.refresh(user)
         return user
 
@@ -139,7 +151,7 @@ class UserService:
         if form_data.new_password != form_data.confirm_new_password:
             raise PasswordsDoNotMatch()
 
-        user.passwordHash = generateHashKey(form_data.new_password)
+        user.passwordHash = await password_hasher.hash(form_data.new_password)
 
         await session.commit()
         await session.refresh(user)
@@ -172,6 +184,8 @@ class UserService:
     async def remove_user(self, user: User, session: AsyncSession) -> None:
         await session.delete(user)
         await session.commit()
+        await invalidate_principal(user.uid)
+        await invalidate_ip_index(user.uid)
         return None
 
     async def add_allowed_ip(self, user: User, ip: str, session: AsyncSession):
@@ -183,6 +197,8 @@ class UserService:
         # link the new ip to the user
         user.knownIps.append(new_ip)
         await session.commit()
+        await invalidate_principal(user.uid)
+        await invalidate_ip_index(user.uid)
         await session.refresh(user)
         return user
 
@@ -193,8 +209,10 @@ class UserService:
         await session.commit()
 
         # link the new ip to the user
-        user.knownIps.append(new_ip)
+        user.bannedIps.append(new_ip)
         await session.commit()
+        await invalidate_principal(user.uid)
+        await invalidate_ip_index(user.uid)
         await session.refresh(user)
         return user
 
@@ -206,6 +224,8 @@ class UserService:
         if banned_ip is not None:
             await session.delete(banned_ip)
             await session.commit()
+            await invalidate_principal(user.uid)
+            await invalidate_ip_index(user.uid)
         return None
 
 
@@ -0,0 +1,111 @@
+import math
+from collections import defaultdict
+from typing import Dict, List
+
+from src.config.settings import Config
+from src.db.redis import redis_client
+from src.errors import TooManyAttempts
+from src.utils.logger import LOGGER
+
+# Checks every bucket with a single atomic call and only takes a token from them when all of them have
+# one, so a request rejected by one bucket does not drain the others. Time comes from the Redis server
+# so every worker shares one clock.
+#   KEYS: bucket keys
+#   ARGV: capacity_1, rate_1, capacity_2, rate_2, ... (rate is tokens per second)
+#   Returns: {allowed (0/1), retry_after seconds, index of the first bucket that throttled (1-based)}
+TOKEN_BUCKET_SCRIPT = """
+redis.replicate_commands()
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local levels = {}
+local retry_after = 0
+local throttled_by = 0
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if tokens < 1 then
+        local wait = math.ceil((1 - tokens) / rate)
+        if wait > retry_after then
+            retry_after = wait
+        end
+        if throttled_by == 0 then
+            throttled_by = i
+        end
+    end
+end
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local tokens = levels[i]
+    if throttled_by == 0 then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+end
+
+if throttled_by == 0 then
+    return {1, 0, 0}
+end
+return {0, retry_after, throttled_by}
+"""
+
+token_bucket = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+
+
+class Bucket:
+    """`capacity` attempts, refilled evenly over `period` seconds."""
+
+    def __init__(self, name: str, capacity: int, period: int):
+        self.name = name
+        self.capacity = capacity
+        self.rate = capacity / period
+
+    def key(self, identity: str) -> str:
+        return f"throttle:{self.name}:{identity}"
+
+
+LOGIN_IP_BUCKET = Bucket("login_ip", Config.THROTTLE_LOGIN_PER_IP, Config.THROTTLE_PERIOD)
+LOGIN_EMAIL_BUCKET = Bucket("login_email", Config.THROTTLE_LOGIN_PER_EMAIL, Config.THROTTLE_PERIOD)
+SIGNUP_IP_BUCKET = Bucket("signup_ip", Config.THROTTLE_SIGNUP_PER_IP, Config.THROTTLE_PERIOD)
+SIGNUP_EMAIL_BUCKET = Bucket("signup_email", Config.THROTTLE_SIGNUP_PER_EMAIL, Config.THROTTLE_PERIOD)
+
+throttle_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"allowed": 0, "throttled": 0})
+
+
+async def consume(checks: List[tuple[Bucket, str]]) -> None:
+    """
+    Takes one token from each `(bucket, identity)` pair or raises `TooManyAttempts` with the number of
+    seconds until the request would be allowed. Fails open if Redis is unavailable.
+    """
+    keys = [bucket.key(identity) for bucket, identity in checks]
+    args = [value for bucket, _ in checks for value in (bucket.capacity, bucket.rate)]
+    try:
+        allowed, retry_after, throttled_by = await token_bucket(keys=keys, args=args)
+    except Exception as e:
+        LOGGER.warning(f"Throttling skipped, Redis unavailable: {e}")
+        return
+
+    if allowed:
+        for bucket, _ in checks:
+            throttle_stats[bucket.name]["allowed"] += 1
+        return
+
+    bucket = checks[throttled_by - 1][0]
+    throttle_stats[bucket.name]["throttled"] += 1
+    raise TooManyAttempts(retry_after=max(1, math.ceil(retry_after)))
+
+
+async def throttle_login(ip: str, email: str) -> None:
+    await consume([(LOGIN_IP_BUCKET, ip), (LOGIN_EMAIL_BUCKET, email.lower())])
+
+
+async def throttle_signup(ip: str, email: str) -> None:
+    await consume([(SIGNUP_IP_BUCKET, ip), (SIGNUP_EMAIL_BUCKET, email.lower())])
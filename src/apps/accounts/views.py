@@ -16,8 +16,10 @@ from src.apps.accounts.dependencies import AccessTokenBearer, RefreshTokenBearer
 from src.apps.accounts.enums import UserRole
 from src.apps.accounts.models import Card, User
 from src.db.db import get_session
-from src.apps.accounts.schemas import AccessToken, CardCreateSchema, CardRead, ConflictingIpMessage, DeleteMessage, IpCreateSchema, Message, PasswordResetConfirmModel, PasswordResetRequestModel, Token, UserCreateOrLoginSchema, UserRead, UserUpdateSchema, Verification
+from src.db.pagination import CursorPage, CursorParams, cursor_paginate
+from src.apps.accounts.schemas import AccessToken, CardCreateSchema, CardRead, ConflictingIpMessage, DeleteMessage, IpCreateSchema, Message, PasswordResetConfirmModel, PasswordResetRequestModel, Principal, Token, UserCreateOrLoginSchema, UserRead, UserUpdateSchema, Verification
 from src.apps.accounts.services import UserService
+from src.apps.accounts.throttling import throttle_login, throttle_signup
 from src.errors import BannedIp, CardAlreadyExists, CardNotFound, FormDataRequired, InsufficientPermission, InvalidCredentials, InvalidToken, PasswordsDoNotMatch, ProxyConflict, UnknownIpConflict, UserAlreadyExists, UserBlocked, UserNotFound
 from src.config.settings import Config
 from src.db.redis import (
@@ -44,10 +46,12 @@ user_router = APIRouter()
         status.HTTP_404_NOT_FOUND: {"model": Message},
         status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
         status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": Message},
+        status.HTTP_429_TOO_MANY_REQUESTS: {"model": Message},
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
 async def register(request: Request, form_data: Annotated[UserCreateOrLoginSchema, Body()], permission: Optional[UserRole] = UserRole.COMPANY, session: AsyncSession = Depends(get_session)):
+    await throttle_signup(get_ip_address(request), form_data.email)
     code = await user_service.register_new_user(permission, form_data, request, session)
     return JSONResponse(
         status_code=status.HTTP_201_CREATED,
@@ -64,10 +68,12 @@ async def register(request: Request, form_data: Annotated[UserCreateOrLoginSchem
         status.HTTP_404_NOT_FOUND: {"model": Message},
         status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
         status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": Message},
+        status.HTTP_429_TOO_MANY_REQUESTS: {"model": Message},
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
 async def login(request: Request, form_data: Annotated[UserCreateOrLoginSchema, Body(...)], session: AsyncSession = Depends(get_session)):
+    await throttle_login(get_ip_address(request), form_data.email)
     user = await user_service.authenticate_user(form_data, request, session)
     access_token = create_access_token(
         user_data={
@@ -281,12 +287,39 @@ async def reset_account_password(
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def all_users(request: Request, user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def all_users(
+    request: Request, user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)
+):
     if not user.isSuperuser:
         raise InsufficientPermission()
     page: Page[UserRead] = await paginate(session, select(User).where(User.uid != user.uid).order_by(User.firstName, User.companyName))
     return page.model_dump()
 
+@user_router.get(
+    "/cursor",
+    status_code=status.HTTP_200_OK,
+    response_model=CursorPage[UserRead],
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": Message},
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_404_NOT_FOUND: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": Message},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
+    }
+)
+async def all_users_by_cursor(
+    request: Request,
+    params: CursorParams = Depends(),
+    user: Principal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    if not user.isSuperuser:
+        raise InsufficientPermission()
+    return await cursor_paginate(
+        session, select(User).where(User.uid != user.uid), [User.joined, User.uid], params, UserRead
+    )
+
 @user_router.get(
     "/me",
     status_code=status.HTTP_200_OK,
@@ -300,8 +333,8 @@ async def all_users(request: Request, user: User = Depends(get_current_user), se
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def me(request: Request, user: User = Depends(get_current_user)):
-    return user
+async def me(request: Request, user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+    return await user_service.get_user_by_email_or_uid(uid=user.uid, session=session)
 
 @user_router.get(
     "/{uid}",
@@ -316,7 +349,7 @@ async def me(request: Request, user: User = Depends(get_current_user)):
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def get_user_profile(uid: Annotated[uuid.UUID, Path], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def get_user_profile(uid: Annotated[uuid.UUID, Path], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if user.uid != uid and not user.isSuperuser:
         raise InsufficientPermission()
     user_to_fetch = await user_service.get_user_by_email_or_uid(uid=uid, session=session)
@@ -335,7 +368,7 @@ async def get_user_profile(uid: Annotated[uuid.UUID, Path], user: User = Depends
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def update_profile(uid: Annotated[uuid.UUID, Path(title="Unique user uid")],  background_tasks: BackgroundTasks, form_data: Annotated[UserUpdateSchema, Body(...)], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def update_profile(uid: Annotated[uuid.UUID, Path(title="Unique user uid")],  background_tasks: BackgroundTasks, form_data: Annotated[UserUpdateSchema, Body(...)], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     LOGGER.debug(f"Form Data: {form_data}")
     if user.uid != uid and not user.isSuperuser:
         raise InsufficientPermission()
@@ -357,7 +390,7 @@ async def update_profile(uid: Annotated[uuid.UUID, Path(title="Unique user uid")
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def update_profile_photo(uid: Annotated[uuid.UUID, Path(title="Unique user uid")],  background_tasks: BackgroundTasks, form_data: Annotated[UploadFile, Body(...)], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def update_profile_photo(uid: Annotated[uuid.UUID, Path(title="Unique user uid")],  background_tasks: BackgroundTasks, form_data: Annotated[UploadFile, Body(...)], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     LOGGER.debug(f"Form Data: {form_data}")
     if user.uid != uid and not user.isSuperuser:
         raise InsufficientPermission()
@@ -379,7 +412,7 @@ async def update_profile_photo(uid: Annotated[uuid.UUID, Path(title="Unique user
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def update_profile_password(uid: Annotated[uuid.UUID, Path(title="Unique user uid")],  background_tasks: BackgroundTasks, form_data: PasswordResetConfirmModel, user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def update_profile_password(uid: Annotated[uuid.UUID, Path(title="Unique user uid")],  background_tasks: BackgroundTasks, form_data: PasswordResetConfirmModel, user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     LOGGER.debug(f"Form Data: {form_data}")
     if user.uid != uid:
         raise InsufficientPermission()
@@ -401,7 +434,7 @@ async def update_profile_password(uid: Annotated[uuid.UUID, Path(title="Unique u
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def delete_profile(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def delete_profile(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if user.uid != uid and not user.isSuperuser:
         raise InsufficientPermission()
     user_to_remove = await user_service.get_user_by_email_or_uid(uid=uid, session=session)
@@ -423,7 +456,7 @@ async def delete_profile(request: Request, uid: Annotated[uuid.UUID, Path(title=
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def add_new_ip_address(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], form_data: Annotated[IpCreateSchema, Body(...)], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def add_new_ip_address(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], form_data: Annotated[IpCreateSchema, Body(...)], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if user.uid != uid and not user.isSuperuser:
         raise InsufficientPermission()
     user_to_add_ip = await user_service.get_user_by_email_or_uid(uid=uid, session=session)
@@ -445,7 +478,7 @@ async def add_new_ip_address(request: Request, uid: Annotated[uuid.UUID, Path(ti
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def ban_new_ip_address(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], form_data: Annotated[IpCreateSchema, Body(...)], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def ban_new_ip_address(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], form_data: Annotated[IpCreateSchema, Body(...)], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if user.uid != uid and not user.isSuperuser:
         raise InsufficientPermission()
     user_to_add_ip = await user_service.get_user_by_email_or_uid(uid=uid, session=session)
@@ -467,7 +500,7 @@ async def ban_new_ip_address(request: Request, uid: Annotated[uuid.UUID, Path(ti
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def unban_new_ip_address(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], ip: Annotated[str, Path(title="Unique ip uid")], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def unban_new_ip_address(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], ip: Annotated[str, Path(title="Unique ip uid")], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if user.uid != uid and not user.isSuperuser:
         raise InsufficientPermission()
     user_to_add_ip = await user_service.get_user_by_email_or_uid(uid=uid, session=session)
@@ -489,7 +522,7 @@ async def unban_new_ip_address(request: Request, uid: Annotated[uuid.UUID, Path(
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def add_new_debit_card(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], form_data: Annotated[CardCreateSchema, Body(...)], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def add_new_debit_card(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], form_data: Annotated[CardCreateSchema, Body(...)], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if user.uid != uid and not user.isSuperuser:
         raise InsufficientPermission()
     user_to_add_card = await user_service.get_user_by_email_or_uid(uid=uid, session=session)
@@ -518,7 +551,7 @@ async def add_new_debit_card(request: Request, uid: Annotated[uuid.UUID, Path(ti
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def update_debit_card(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], cardNumber: Annotated[PaymentCardNumber, Path(title="Unique debit card number")], form_data: Annotated[dict, Body(...)], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def update_debit_card(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], cardNumber: Annotated[PaymentCardNumber, Path(title="Unique debit card number")], form_data: Annotated[dict, Body(...)], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if user.uid != uid and not user.isSuperuser:
         raise InsufficientPermission()
     db_result = await session.exec(select(Card).where(Card.cardNumber == cardNumber).where(Card.userUid==uid))
@@ -545,7 +578,7 @@ async def update_debit_card(request: Request, uid: Annotated[uuid.UUID, Path(tit
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def get_all_debit_cards(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], cardNumber: Annotated[PaymentCardNumber, Path(title="Unique debit card number")], form_data: Annotated[dict, Body(...)], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def get_all_debit_cards(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], cardNumber: Annotated[PaymentCardNumber, Path(title="Unique debit card number")], form_data: Annotated[dict, Body(...)], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if user.uid != uid:
         raise InsufficientPermission()
 
@@ -566,7 +599,7 @@ async def get_all_debit_cards(request: Request, uid: Annotated[uuid.UUID, Path(t
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def get_debit_card(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], cardNumber: Annotated[PaymentCardNumber, Path(title="Unique debit card number")], form_data: Annotated[dict, Body(...)], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def get_debit_card(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique user uid")], cardNumber: Annotated[PaymentCardNumber, Path(title="Unique debit card number")], form_data: Annotated[dict, Body(...)], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if user.uid != uid and not user.isSuperuser:
         raise InsufficientPermission()
     db_result = await session.exec(select(Card).where(Card.cardNumber == cardNumber).where(Card.userUid==uid))
@@ -0,0 +1,172 @@
+"""
+Streaming exports of page views for offline analysis.
+
+Rows come from a server-side cursor in chunks of ANALYTICS_EXPORT_CHUNK_ROWS and each chunk is
+encoded and sent before the next is fetched, so memory stays flat whatever the size of the export.
+Parquet needs pyarrow, which is imported only when that format is requested.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence
+
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import select
+
+from src.apps.analytics.models import Analytics, PageView
+from src.config.settings import Config
+from src.errors import ExportFormatUnavailable
+
+EXPORT_COLUMNS = ["uid", "date", "ip", "timeSpentInSeconds", "analyticsUid", "pathname", "domain"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def export_statement(domain: str, start: Optional[datetime], end: Optional[datetime]):
+    statement = (
+        select(
+            PageView.uid,
+            PageView.date,
+            PageView.ip,
+            PageView.timeSpentInSeconds,
+            PageView.analyticsUid,
+            Analytics.pathname,
+            Analytics.domain,
+        )
+        .join(Analytics, Analytics.uid == PageView.analyticsUid)
+        .where(Analytics.domain == domain)
+        # uuid7 keys sort by creation time, and each partition can walk its primary key in order
+        .order_by(PageView.uid)
+    )
+    # Bounds on the partition key let Postgres skip the months outside the range
+    if start is not None:
+        statement = statement.where(PageView.date >= start)
+    if end is not None:
+        statement = statement.where(PageView.date < end)
+    return statement
+
+
+async def _chunks(
+    factory: sessionmaker, domain: str, start: Optional[datetime], end: Optional[datetime]
+) -> AsyncIterator[Sequence]:
+    async with factory() as session:
+        result = await session.stream(
+            export_statement(domain, start, end).execution_options(yield_per=Config.ANALYTICS_EXPORT_CHUNK_ROWS)
+        )
+        async for rows in result.partitions():
+            yield rows
+
+
+def _ndjson(rows: Sequence) -> bytes:
+    return "".join(
+        json.dumps(
+            {
+                "uid": str(row.uid),
+                "date": row.date.isoformat(),
+                "ip": row.ip,
+                "timeSpentInSeconds": row.timeSpentInSeconds,
+                "analyticsUid": str(row.analyticsUid),
+                "pathname": row.pathname,
+                "domain": row.domain,
+            }
+        ) + "\n"
+        for row in rows
+    ).encode()
+
+
+def _csv(rows: Sequence, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(
+        (row.uid, row.date.isoformat(), row.ip, row.timeSpentInSeconds, row.analyticsUid, row.pathname, row.domain)
+        for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """A write-only file that hands back whatever was written since the last `drain`."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def _load_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportFormatUnavailable()
+    return pyarrow
+
+
+def check_format(export_format: str) -> None:
+    """Fails before the response starts when the format cannot be produced."""
+    if export_format == "parquet":
+        _load_pyarrow()
+
+
+async def _parquet(chunks: AsyncIterator[Sequence]) -> AsyncIterator[bytes]:
+    pa = _load_pyarrow()
+    schema = pa.schema([
+        ("uid", pa.string()),
+        ("date", pa.timestamp("us")),
+        ("ip", pa.string()),
+        ("timeSpentInSeconds", pa.int64()),
+        ("analyticsUid", pa.string()),
+        ("pathname", pa.string()),
+        ("domain", pa.string()),
+    ])
+    sink = _ChunkSink()
+    # Each chunk from the cursor becomes one row group, sent as soon as it is written
+    with pa.parquet.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd") as writer:
+        async for rows in chunks:
+            writer.write_table(pa.Table.from_pydict(
+                {
+                    "uid": [str(row.uid) for row in rows],
+                    "date": [row.date for row in rows],
+                    "ip": [row.ip for row in rows],
+                    "timeSpentInSeconds": [row.timeSpentInSeconds for row in rows],
+                    "analyticsUid": [str(row.analyticsUid) for row in rows],
+                    "pathname": [row.pathname for row in rows],
+                    "domain": [row.domain for row in rows],
+                },
+                schema=schema,
+            ))
+            yield sink.drain()
+    # The footer is only written when the writer closes
+    yield sink.drain()
+
+
+async def export_page_views(
+    factory: sessionmaker, export_format: str, domain: str, start: Optional[datetime], end: Optional[datetime]
+) -> AsyncIterator[bytes]:
+    """The encoded export, chunk by chunk, for a StreamingResponse."""
+    chunks = _chunks(factory, domain, start, end)
+    if export_format == "parquet":
+        async for data in _parquet(chunks):
+            yield data
+        return
+
+    if export_format == "csv":
+        yield _csv([], header=True)
+    async for rows in chunks:
+        yield _csv(rows, header=False) if export_format == "csv" else _ndjson(rows)
@@ -2,19 +2,29 @@ from datetime import date, datetime
 from decimal import Decimal
 from pydantic import AnyHttpUrl, EmailStr, FileUrl, IPvAnyAddress
 from sqlmodel import SQLModel, Field, Relationship, Column
+from sqlalchemy import DDL, Index, event, text
 import sqlalchemy.dialects.postgresql as pg
 import uuid
 from typing import List, Optional
 from pydantic_extra_types.phone_numbers import PhoneNumber
 
+from src.apps.analytics.partitions import initial_partition_ddl
+from src.config.settings import Config
+from src.utils.uuid7 import UUID_GENERATE_V7_SQL, uuid7
+
+# The uid server defaults below call this function, so create_all needs it to exist first
+event.listen(SQLModel.metadata, "before_create", DDL(UUID_GENERATE_V7_SQL).execute_if(dialect="postgresql"))
+
 
 # User Specific Models
 class Analytics(SQLModel, table=True):
     __tablename__ = "analytics"
+    __table_args__ = (Index("ix_analytics_domain_created_at", "domain", "createdAt"),)
 
     uid: uuid.UUID = Field(
+        default_factory=uuid7,
         sa_column=Column(
-            pg.UUID, primary_key=True, unique=True, nullable=False, default=uuid.uuid4
+            pg.UUID, primary_key=True, unique=True, nullable=False, default=uuid7, server_default=text("uuid_generate_v7()")
         )
     )
 
@@ -36,19 +46,32 @@ class Analytics(SQLModel, table=True):
 
 class PageView(SQLModel, table=True):
     __tablename__ = "page_views"
+    # Partitioned by month on `date`, so the primary key has to include it
+    __table_args__ = (
+        Index("ix_page_views_analytics_uid_date", "analyticsUid", "date"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
 
     uid: uuid.UUID = Field(
+        default_factory=uuid7,
         sa_column=Column(
-            pg.UUID, primary_key=True, unique=True, nullable=False, default=uuid.uuid4
+            pg.UUID, primary_key=True, nullable=False, default=uuid7, server_default=text("uuid_generate_v7()")
         )
     )
 
     ip: str = Field(nullable=False)
     buttonsClicked: List["ButtonsClicked"] = Relationship(
-        back_populates="pageView", sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "selectin"}
+        back_populates="pageView",
+        sa_relationship_kwargs={
+            "cascade": "all, delete-orphan",
+            "lazy": "selectin",
+            "primaryjoin": "foreign(ButtonsClicked.pageViewUid) == PageView.uid",
+        },
     )  # Track buttons clicked
     timeSpentInSeconds: int = Field(default=0)  # Store time spent in seconds
-    date: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(pg.TIMESTAMP, nullable=False))
+    date: datetime = Field(
+        default_factory=datetime.utcnow, sa_column=Column(pg.TIMESTAMP, primary_key=True, nullable=False)
+    )
 
     # Foreign Key to Analytics
     analyticsUid: Optional[uuid.UUID] = Field(default=None, foreign_key="analytics.uid")
@@ -60,16 +83,74 @@ class PageView(SQLModel, table=True):
 
 class ButtonsClicked(SQLModel, table=True):
     __tablename__ = "buttons_clicked"
+    __table_args__ = (
+        Index("ix_buttons_clicked_page_view_uid", "pageViewUid"),
+        {"postgresql_partition_by": 'RANGE ("createdAt")'},
+    )
 
     uid: uuid.UUID = Field(
+        default_factory=uuid7,
         sa_column=Column(
-            pg.UUID, primary_key=True, unique=True, nullable=False, default=uuid.uuid4
+            pg.UUID, primary_key=True, nullable=False, default=uuid7, server_default=text("uuid_generate_v7()")
         )
     )
 
     buttonName: Optional[str] = Field(default=None)
 
-    pageViewUid: Optional[uuid.UUID] = Field(default=None, foreign_key="page_views.uid")
-    pageView: Optional[PageView] = Relationship(back_populates="buttonsClicked")
+    # No foreign key: page_views.uid is only unique together with the partition key
+    pageViewUid: Optional[uuid.UUID] = Field(default=None)
+    pageView: Optional[PageView] = Relationship(
+        back_populates="buttonsClicked",
+        sa_relationship_kwargs={"primaryjoin": "foreign(ButtonsClicked.pageViewUid) == PageView.uid"},
+    )
+
+    createdAt: datetime = Field(
+        default_factory=datetime.utcnow, sa_column=Column(pg.TIMESTAMP, primary_key=True, nullable=False)
+    )
+
+
+class AnalyticsRollupBase(SQLModel):
+    """Per (domain, pathname, bucket) totals maintained by the rollup task from the raw tables."""
+
+    domain: str = Field(primary_key=True)
+    pathname: str = Field(primary_key=True)
+    # sa_type rather than sa_column: a Column object cannot be shared by the two rollup tables
+    bucket: datetime = Field(primary_key=True, sa_type=pg.TIMESTAMP)
+
+    views: int = Field(default=0)
+    uniqueIps: int = Field(default=0)
+    timeSpentSeconds: int = Field(default=0, sa_type=pg.BIGINT)
+    buttonClicks: int = Field(default=0)
+    buttons: dict = Field(default_factory=dict, sa_type=pg.JSONB)
+
+    updatedAt: datetime = Field(default_factory=datetime.utcnow, sa_type=pg.TIMESTAMP)
+
+
+class AnalyticsHourlyRollup(AnalyticsRollupBase, table=True):
+    __tablename__ = "analytics_rollups_hourly"
+    __table_args__ = (Index("ix_analytics_rollups_hourly_domain_bucket", "domain", "bucket"),)
+
+
+class AnalyticsDailyRollup(AnalyticsRollupBase, table=True):
+    __tablename__ = "analytics_rollups_daily"
+    __table_args__ = (Index("ix_analytics_rollups_daily_domain_bucket", "domain", "bucket"),)
+
+
+class AnalyticsRollupState(SQLModel, table=True):
+    """High-water mark of the rollup task: every row with a smaller uid has been rolled up."""
+
+    __tablename__ = "analytics_rollup_state"
+
+    name: str = Field(primary_key=True)
+    watermark: uuid.UUID = Field(sa_column=Column(pg.UUID, nullable=False))
+    updatedAt: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(pg.TIMESTAMP, nullable=False))
+
+
+def _create_initial_partitions(table, connection, **kw):
+    for ddl in initial_partition_ddl(table.name, Config.PARTITION_MONTHS_AHEAD):
+        connection.execute(text(ddl))
+
 
-    createdAt: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(pg.TIMESTAMP, nullable=False))
+# create_all only creates the partitioned parents; give them partitions so inserts have somewhere to go
+event.listen(PageView.__table__, "after_create", _create_initial_partitions)
+event.listen(ButtonsClicked.__table__, "after_create", _create_initial_partitions)
@@ -0,0 +1,107 @@
+"""Monthly range partitions for the high-volume analytics tables."""
+import re
+import uuid
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.utils.logger import LOGGER
+
+# Partitioned table -> partition key column
+PARTITIONED_TABLES: Dict[str, str] = {
+    "page_views": "date",
+    "buttons_clicked": "createdAt",
+}
+
+_MONTH_SUFFIX = re.compile(r"_(\d{4})_(\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def partition_ddl(table: str, month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def default_partition_ddl(table: str) -> str:
+    # Catches rows outside every monthly partition instead of failing the insert. Event times are
+    # clamped close to the write time, so it should stay empty; create_partitions cannot add a month
+    # that already has rows here.
+    return f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+
+
+def initial_partition_ddl(table: str, months_ahead: int, today: Optional[date] = None) -> List[str]:
+    first = (today or date.today()).replace(day=1)
+    return [default_partition_ddl(table)] + [partition_ddl(table, add_months(first, n)) for n in range(months_ahead + 1)]
+
+
+async def create_partitions(session: AsyncSession, months_ahead: int, today: Optional[date] = None) -> List[str]:
+    """Creates the current month's partition and the next `months_ahead` ones. Returns the new ones."""
+    first = (today or date.today()).replace(day=1)
+    created = []
+    for table in PARTITIONED_TABLES:
+        for n in range(months_ahead + 1):
+            month = add_months(first, n)
+            name = partition_name(table, month)
+            exists = (await session.execute(text("SELECT to_regclass(:name)"), {"name": name})).scalar()
+            if exists is None:
+                await session.execute(text(partition_ddl(table, month)))
+                created.append(name)
+    await session.commit()
+    return created
+
+
+async def drop_expired_partitions(
+    session: AsyncSession, cutoff: date, watermark: uuid.UUID, detach_only: bool = False
+) -> List[str]:
+    """
+    Detaches every monthly partition that ends on or before `cutoff` and, unless `detach_only`, drops
+    it. Dropping a month is a metadata operation, unlike a DELETE of its rows. A month that still holds
+    rows above the rollup `watermark` is kept until the rollups have folded them in.
+    """
+    removed = []
+    for table in PARTITIONED_TABLES:
+        db_result = await session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+                "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+                "WHERE parent.relname = :table"
+            ),
+            {"table": table},
+        )
+        for (name,) in db_result.all():
+            match = _MONTH_SUFFIX.search(name)
+            if match is None:
+                continue
+            month = date(int(match.group(1)), int(match.group(2)), 1)
+            if add_months(month, 1) > cutoff:
+                continue
+
+            # Same test as retention: uuid7 keys at or above the watermark are not rolled up yet
+            unfolded = await session.execute(
+                text(f"SELECT EXISTS (SELECT 1 FROM {name} WHERE uid >= :watermark AND substring(uid::text, 15, 1) = '7')"),
+                {"watermark": watermark},
+            )
+            if unfolded.scalar():
+                LOGGER.info(f"Keeping expired partition {name}: it has rows the rollups have not folded in yet")
+                continue
+
+            await session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if not detach_only:
+                await session.execute(text(f"DROP TABLE {name}"))
+            removed.append(name)
+            LOGGER.info(f"{'Detached' if detach_only else 'Dropped'} expired partition {name}")
+    await session.commit()
+    return removed
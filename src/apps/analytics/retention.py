@@ -0,0 +1,190 @@
+"""
+Per-domain retention of raw analytics rows.
+
+Page views older than the domain's policy are deleted together with their button clicks, in
+batches of ANALYTICS_RETENTION_BATCH rows with one short transaction each. Everything happens in
+SQL, so no rows are loaded into the ORM. Only rows the rollup job has already folded into the
+aggregates are removed; the rest wait for a later run. Hourly rollups older than
+ANALYTICS_HOURLY_ROLLUP_RETENTION_DAYS are dropped as well, leaving the daily ones.
+
+Nothing is deleted unless a policy is configured: ANALYTICS_RETENTION_DAYS defaults to None, which
+keeps rows forever.
+"""
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.apps.analytics.models import AnalyticsRollupState
+from src.apps.analytics.rollups import STATE_NAME
+from src.config.settings import Config
+from src.utils.logger import LOGGER
+
+# Rows below the rollup watermark have been folded in. Random (v4) keys from before the switch to
+# uuid7 do not compare meaningfully with it, but they were all folded by the first rollup run.
+DELETE_PAGE_VIEWS_SQL = """
+WITH doomed AS (
+    SELECT pv.uid, pv.date
+    FROM page_views pv
+    JOIN analytics a ON a.uid = pv."analyticsUid"
+    WHERE a.domain = :domain
+      AND pv.date < :cutoff
+      AND (pv.uid < :watermark OR substring(pv.uid::text, 15, 1) <> '7')
+    LIMIT :batch
+),
+deleted_clicks AS (
+    DELETE FROM buttons_clicked bc USING doomed d
+    WHERE bc."pageViewUid" = d.uid
+    RETURNING 1
+),
+deleted_views AS (
+    DELETE FROM page_views pv USING doomed d
+    WHERE pv.uid = d.uid AND pv.date = d.date
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM deleted_views), (SELECT count(*) FROM deleted_clicks)
+"""
+
+# Analytics rows whose page views are all gone
+DELETE_ANALYTICS_SQL = """
+DELETE FROM analytics
+WHERE uid IN (
+    SELECT a.uid
+    FROM analytics a
+    WHERE a.domain = :domain
+      AND a."createdAt" < :cutoff
+      AND NOT EXISTS (SELECT 1 FROM page_views pv WHERE pv."analyticsUid" = a.uid)
+    LIMIT :batch
+)
+"""
+
+# Clicks that never matched a page view belong to no domain, and the rollups never count them
+DELETE_ORPHAN_CLICKS_SQL = """
+DELETE FROM buttons_clicked
+WHERE (uid, "createdAt") IN (
+    SELECT uid, "createdAt"
+    FROM buttons_clicked
+    WHERE "pageViewUid" IS NULL AND "createdAt" < :cutoff
+    LIMIT :batch
+)
+"""
+
+DELETE_HOURLY_ROLLUPS_SQL = """
+DELETE FROM analytics_rollups_hourly
+WHERE ctid = ANY(ARRAY(SELECT ctid FROM analytics_rollups_hourly WHERE bucket < :cutoff LIMIT :batch))
+"""
+
+
+def retention_days(domain: str) -> Optional[int]:
+    """The domain's policy from ANALYTICS_RETENTION_POLICIES, else ANALYTICS_RETENTION_DAYS. None or 0 keeps everything."""
+    return (Config.ANALYTICS_RETENTION_POLICIES or {}).get(domain, Config.ANALYTICS_RETENTION_DAYS)
+
+
+def longest_retention_days() -> Optional[int]:
+    """The longest policy of any domain, or None when any policy keeps rows forever."""
+    policies = [Config.ANALYTICS_RETENTION_DAYS, *(Config.ANALYTICS_RETENTION_POLICIES or {}).values()]
+    if not all(policies):
+        return None
+    return max(policies)
+
+
+def partition_drop_cutoff(today: date) -> Optional[date]:
+    """
+    Whole months can be dropped only once they are past every domain's retention, so the longest
+    policy wins. Returns None, meaning nothing may be dropped, when any policy keeps rows forever.
+    """
+    days = longest_retention_days()
+    return None if days is None else today - timedelta(days=days)
+
+
+async def _domains(session: AsyncSession) -> List[str]:
+    db_result = await session.execute(text("SELECT DISTINCT domain FROM analytics"))
+    return [domain for domain, in db_result.all()]
+
+
+class _Budget:
+    def __init__(self, seconds: float):
+        self.deadline = time.monotonic() + seconds
+
+    @property
+    def exhausted(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+
+async def _purge_domain(session: AsyncSession, domain: str, cutoff: datetime, watermark, budget: _Budget) -> Dict[str, int]:
+    removed = {"page_views": 0, "buttons_clicked": 0, "analytics": 0}
+    params = {"domain": domain, "cutoff": cutoff, "watermark": watermark, "batch": Config.ANALYTICS_RETENTION_BATCH}
+
+    while not budget.exhausted:
+        views, clicks = (await session.execute(text(DELETE_PAGE_VIEWS_SQL), params)).one()
+        await session.commit()
+        removed["page_views"] += views
+        removed["buttons_clicked"] += clicks
+        if views < Config.ANALYTICS_RETENTION_BATCH:
+            break
+
+    while not budget.exhausted:
+        db_result = await session.execute(text(DELETE_ANALYTICS_SQL), params)
+        await session.commit()
+        removed["analytics"] += db_result.rowcount
+        if db_result.rowcount < Config.ANALYTICS_RETENTION_BATCH:
+            break
+    return removed
+
+
+async def apply_retention(session: AsyncSession, now: Optional[datetime] = None) -> dict:
+    """
+    Applies every domain's policy until done or until ANALYTICS_RETENTION_TIME_BUDGET runs out; the
+    next run carries on where this one stopped. Returns the rows removed per domain and the time taken.
+    """
+    started_at = time.perf_counter()
+    now = now or datetime.utcnow()
+    budget = _Budget(Config.ANALYTICS_RETENTION_TIME_BUDGET)
+
+    state = await session.get(AnalyticsRollupState, STATE_NAME)
+    if state is None:
+        LOGGER.info("Skipping analytics retention: the rollups have not run yet")
+        return {"domains": {}, "orphan_buttons_clicked": 0, "hourly_rollups": 0, "elapsed_ms": 0.0, "completed": False}
+    watermark = state.watermark
+
+    domains = {}
+    for domain in await _domains(session):
+        days = retention_days(domain)
+        if not days or budget.exhausted:
+            continue
+        domains[domain] = await _purge_domain(session, domain, now - timedelta(days=days), watermark, budget)
+
+    # Orphan clicks carry no domain, so they go only once they are past every domain's policy
+    orphan_clicks = 0
+    days = longest_retention_days()
+    if days is not None:
+        params = {"cutoff": now - timedelta(days=days), "batch": Config.ANALYTICS_RETENTION_BATCH}
+        while not budget.exhausted:
+            db_result = await session.execute(text(DELETE_ORPHAN_CLICKS_SQL), params)
+            await session.commit()
+            orphan_clicks += db_result.rowcount
+            if db_result.rowcount < Config.ANALYTICS_RETENTION_BATCH:
+                break
+
+    hourly_rollups = 0
+    if Config.ANALYTICS_HOURLY_ROLLUP_RETENTION_DAYS:
+        params = {
+            "cutoff": now - timedelta(days=Config.ANALYTICS_HOURLY_ROLLUP_RETENTION_DAYS),
+            "batch": Config.ANALYTICS_RETENTION_BATCH,
+        }
+        while not budget.exhausted:
+            db_result = await session.execute(text(DELETE_HOURLY_ROLLUPS_SQL), params)
+            await session.commit()
+            hourly_rollups += db_result.rowcount
+            if db_result.rowcount < Config.ANALYTICS_RETENTION_BATCH:
+                break
+
+    return {
+        "domains": domains,
+        "orphan_buttons_clicked": orphan_clicks,
+        "hourly_rollups": hourly_rollups,
+        "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 1),
+        "completed": not budget.exhausted,
+    }
@@ -1,9 +1,9 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Optional
+from typing import Annotated, Dict, List, Literal, Optional, Union
 import uuid
 from fastapi import UploadFile
-from pydantic import BaseModel, Field, IPvAnyAddress
+from pydantic import BaseModel, Field, IPvAnyAddress, TypeAdapter
 
 
 class CreateOrUpdateAnalytics(BaseModel):
@@ -37,3 +37,101 @@ class ButtonClickedRead(BaseModel):
     uid: uuid.UUID
     buttonName: str
     pageViewUid: uuid.UUID
+
+
+MAX_BATCH_EVENTS = 500
+
+
+class PageViewEvent(BaseModel):
+    type: Literal["page_view"]
+    pathname: str
+    ip: Optional[str] = Field(default=None, max_length=45)
+    timeSpendInSeconds: int = Field(default=0, ge=0)
+    buttons: List[str] = Field(default_factory=list)
+    occurredAt: Optional[datetime] = None
+
+
+class ButtonClickEvent(BaseModel):
+    type: Literal["button_click"]
+    pathname: str
+    ip: Optional[str] = Field(default=None, max_length=45)
+    buttonName: str
+    occurredAt: Optional[datetime] = None
+
+
+AnalyticsEvent = Annotated[Union[PageViewEvent, ButtonClickEvent], Field(discriminator="type")]
+
+# Validates a whole beacon flush straight from the request body in one pass
+analytics_batch_adapter = TypeAdapter(Annotated[List[AnalyticsEvent], Field(min_length=1, max_length=MAX_BATCH_EVENTS)])
+
+
+class AnalyticsBatchResult(BaseModel):
+    analytics: int
+    pageViews: int
+    buttonsClicked: int
+
+
+class QueuedMessage(BaseModel):
+    message: str
+
+
+class RollupBucket(BaseModel):
+    bucket: datetime
+    pathname: str
+    views: int
+    uniqueIps: int
+    timeSpentSeconds: int
+    avgTimeSpentSeconds: float
+    buttonClicks: int
+    buttons: Dict[str, int]
+
+
+class AnalyticsSummary(BaseModel):
+    granularity: Literal["hour", "day"]
+    start: datetime
+    end: datetime
+    views: int
+    timeSpentSeconds: int
+    avgTimeSpentSeconds: float
+    buttonClicks: int
+    buckets: List[RollupBucket]
+
+
+class UniqueVisitors(BaseModel):
+    pathname: str
+    start: datetime
+    end: datetime
+    uniques: int
+    standardError: float
+
+
+class TopEntry(BaseModel):
+    name: str
+    count: int
+
+
+class TopList(BaseModel):
+    kind: Literal["paths", "buttons"]
+    start: datetime
+    end: datetime
+    items: List[TopEntry]
+
+
+class AnalyticsDashboardRow(BaseModel):
+    uid: uuid.UUID
+    pathname: str
+    domain: str
+    createdAt: datetime
+    pageViews: int
+    uniqueIps: int
+    timeSpentSeconds: int
+    avgTimeSpentSeconds: float
+    buttonClicks: int
+
+
+class PageViewSummary(BaseModel):
+    uid: uuid.UUID
+    ip: str
+    timeSpentInSeconds: int
+    date: datetime
+    buttonClicks: int
@@ -0,0 +1,259 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import Select, distinct, insert, true
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.apps.analytics.models import Analytics, AnalyticsDailyRollup, AnalyticsHourlyRollup, ButtonsClicked, PageView
+from src.apps.analytics.schemas import (
+    AnalyticsBatchResult,
+    AnalyticsEvent,
+    AnalyticsSummary,
+    ButtonClickEvent,
+    PageViewEvent,
+    RollupBucket,
+)
+from src.config.settings import Config
+from src.utils.uuid7 import uuid7
+
+# Events for the same domain and pathname are grouped under one Analytics row per window
+ANALYTICS_WINDOW = timedelta(hours=1)
+
+ROLLUP_MODELS = {"hour": AnalyticsHourlyRollup, "day": AnalyticsDailyRollup}
+
+
+def _as_utc(moment: Optional[datetime], default: datetime) -> datetime:
+    """The columns are naive UTC timestamps."""
+    if moment is None:
+        return default
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def event_time(moment: Optional[datetime], now: datetime) -> datetime:
+    """
+    When an event happened, as naive UTC, clamped to [now - ANALYTICS_EVENT_MAX_AGE_SECONDS,
+    now + ANALYTICS_EVENT_MAX_SKEW_SECONDS]. The value is client supplied and becomes the partition
+    key, so a bad clock must neither land rows in the default partition nor reopen old rollups.
+    """
+    moment = _as_utc(moment, now)
+    earliest = now - timedelta(seconds=Config.ANALYTICS_EVENT_MAX_AGE_SECONDS)
+    latest = now + timedelta(seconds=Config.ANALYTICS_EVENT_MAX_SKEW_SECONDS)
+    return min(max(moment, earliest), latest)
+
+
+class AnalyticsService:
+    async def current_analytics(
+        self, domain: str, pathnames: Iterable[str], now: datetime, session: AsyncSession
+    ) -> tuple[Dict[str, uuid.UUID], int]:
+        """
+        Returns the open Analytics uid for each pathname, inserting rows for the ones that have none
+        in the current window, and how many were inserted. One SELECT plus at most one multi-row INSERT.
+        """
+        pathnames = set(pathnames)
+        db_result = await session.exec(
+            select(Analytics.pathname, Analytics.uid)
+            .where(Analytics.domain == domain)
+            .where(Analytics.pathname.in_(pathnames))
+            .where(Analytics.createdAt >= now - ANALYTICS_WINDOW)
+            .order_by(Analytics.pathname, Analytics.createdAt.desc())
+            .distinct(Analytics.pathname)
+        )
+        analytics_uids = dict(db_result.all())
+
+        missing = [
+            {"uid": uuid7(), "pathname": pathname, "domain": domain, "createdAt": now}
+            for pathname in pathnames - analytics_uids.keys()
+        ]
+        if missing:
+            await session.execute(insert(Analytics), missing)
+            analytics_uids.update((row["pathname"], row["uid"]) for row in missing)
+        return analytics_uids, len(missing)
+
+    async def latest_page_views(
+        self, pairs: Iterable[tuple[uuid.UUID, str]], since: datetime, session: AsyncSession
+    ) -> Dict[tuple[uuid.UUID, str], uuid.UUID]:
+        """The most recent page view uid for each (analyticsUid, ip) pair, in one query."""
+        pairs = set(pairs)
+        if not pairs:
+            return {}
+        db_result = await session.exec(
+            select(PageView.analyticsUid, PageView.ip, PageView.uid)
+            .where(PageView.analyticsUid.in_({analytics_uid for analytics_uid, _ in pairs}))
+            .where(PageView.ip.in_({ip for _, ip in pairs}))
+            .where(PageView.date >= since)
+            .order_by(PageView.analyticsUid, PageView.ip, PageView.date.desc())
+            .distinct(PageView.analyticsUid, PageView.ip)
+        )
+        return {(analytics_uid, ip): uid for analytics_uid, ip, uid in db_result.all() if (analytics_uid, ip) in pairs}
+
+    async def record_events(
+        self, domain: str, ip: str, events: Sequence[AnalyticsEvent], session: AsyncSession
+    ) -> AnalyticsBatchResult:
+        """
+        Writes a batch of beacon events for one domain in a single transaction using multi-row inserts.
+        Button clicks attach to a page view of the same pathname and ip from the batch, or else to
+        the latest stored one; `ip` is used for events that do not carry their own.
+        """
+        now = datetime.utcnow()
+        analytics_uids, created = await self.current_analytics(domain, (event.pathname for event in events), now, session)
+
+        page_views: List[dict] = []
+        buttons: List[dict] = []
+        batch_views: Dict[tuple[uuid.UUID, str], uuid.UUID] = {}
+
+        for event in events:
+            if not isinstance(event, PageViewEvent):
+                continue
+            event_ip = str(event.ip) if event.ip else ip
+            analytics_uid = analytics_uids[event.pathname]
+            occurred_at = event_time(event.occurredAt, now)
+            page_view_uid = uuid7()
+            page_views.append({
+                "uid": page_view_uid,
+                "ip": event_ip,
+                "timeSpentInSeconds": event.timeSpendInSeconds,
+                "date": occurred_at,
+                "analyticsUid": analytics_uid,
+            })
+            batch_views[(analytics_uid, event_ip)] = page_view_uid
+            buttons.extend(
+                {"uid": uuid7(), "buttonName": name, "pageViewUid": page_view_uid, "createdAt": occurred_at}
+                for name in event.buttons
+            )
+
+        clicks = [
+            (event, analytics_uids[event.pathname], str(event.ip) if event.ip else ip)
+            for event in events if isinstance(event, ButtonClickEvent)
+        ]
+        stored_views = await self.latest_page_views(
+            (
+                (analytics_uid, event_ip)
+                for _, analytics_uid, event_ip in clicks
+                if (analytics_uid, event_ip) not in batch_views
+            ),
+            now - ANALYTICS_WINDOW,
+            session,
+        )
+        for event, analytics_uid, event_ip in clicks:
+            key = (analytics_uid, event_ip)
+            buttons.append({
+                "uid": uuid7(),
+                "buttonName": event.buttonName,
+                "pageViewUid": batch_views.get(key) or stored_views.get(key),
+                "createdAt": event_time(event.occurredAt, now),
+            })
+
+        if page_views:
+            await session.execute(insert(PageView), page_views)
+        if buttons:
+            await session.execute(insert(ButtonsClicked), buttons)
+        await session.commit()
+
+        return AnalyticsBatchResult(
+            analytics=created,
+            pageViews=len(page_views),
+            buttonsClicked=len(buttons),
+        )
+
+    async def summary(
+        self,
+        domain: str,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        pathname: Optional[str],
+        session: AsyncSession,
+    ) -> AnalyticsSummary:
+        """
+        Per-bucket figures for [start, end) read from the rollup tables only, so the cost depends on
+        the number of buckets rather than the number of raw events. Unique IPs are per bucket and are
+        not added up, since the same visitor can appear in several buckets.
+        """
+        rollup = ROLLUP_MODELS[granularity]
+        statement = (
+            select(rollup)
+            .where(rollup.domain == domain)
+            .where(rollup.bucket >= start)
+            .where(rollup.bucket < end)
+            .order_by(rollup.bucket, rollup.pathname)
+        )
+        if pathname is not None:
+            statement = statement.where(rollup.pathname == pathname)
+        rows = (await session.exec(statement)).all()
+
+        views = sum(row.views for row in rows)
+        time_spent = sum(row.timeSpentSeconds for row in rows)
+        return AnalyticsSummary(
+            granularity=granularity,
+            start=start,
+            end=end,
+            views=views,
+            timeSpentSeconds=time_spent,
+            avgTimeSpentSeconds=round(time_spent / views, 2) if views else 0,
+            buttonClicks=sum(row.buttonClicks for row in rows),
+            buckets=[
+                RollupBucket(
+                    bucket=row.bucket,
+                    pathname=row.pathname,
+                    views=row.views,
+                    uniqueIps=row.uniqueIps,
+                    timeSpentSeconds=row.timeSpentSeconds,
+                    avgTimeSpentSeconds=round(row.timeSpentSeconds / row.views, 2) if row.views else 0,
+                    buttonClicks=row.buttonClicks,
+                    buttons=row.buttons,
+                )
+                for row in rows
+            ],
+        )
+
+    def dashboard_statement(self, domain: str) -> Select:
+        """
+        One row of counts and averages per Analytics row instead of the nested page view trees. The
+        aggregates are LATERAL subqueries, so Postgres computes them only for the rows of the page.
+        """
+        views = (
+            select(
+                func.count().label("pageViews"),
+                func.count(distinct(PageView.ip)).label("uniqueIps"),
+                func.coalesce(func.sum(PageView.timeSpentInSeconds), 0).label("timeSpentSeconds"),
+                func.coalesce(func.avg(PageView.timeSpentInSeconds), 0).label("avgTimeSpentSeconds"),
+            )
+            .where(PageView.analyticsUid == Analytics.uid)
+            .lateral("views")
+        )
+        clicks = (
+            select(func.count().label("buttonClicks"))
+            .select_from(ButtonsClicked)
+            .join(PageView, PageView.uid == ButtonsClicked.pageViewUid)
+            .where(PageView.analyticsUid == Analytics.uid)
+            .lateral("clicks")
+        )
+        return (
+            select(
+                Analytics.uid, Analytics.pathname, Analytics.domain, Analytics.createdAt,
+                views.c.pageViews, views.c.uniqueIps, views.c.timeSpentSeconds, views.c.avgTimeSpentSeconds,
+                clicks.c.buttonClicks,
+            )
+            .select_from(Analytics)
+            .join(views, true())
+            .join(clicks, true())
+            .where(Analytics.domain == domain)
+        )
+
+    def page_views_statement(self, analytics_uid: uuid.UUID) -> Select:
+        """The page views of one Analytics row with their click counts, without loading the clicks."""
+        clicks = (
+            select(func.count().label("buttonClicks"))
+            .where(ButtonsClicked.pageViewUid == PageView.uid)
+            .lateral("clicks")
+        )
+        return (
+            select(PageView.uid, PageView.ip, PageView.timeSpentInSeconds, PageView.date, clicks.c.buttonClicks)
+            .select_from(PageView)
+            .join(clicks, true())
+            .where(PageView.analyticsUid == analytics_uid)
+        )
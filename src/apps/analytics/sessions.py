@@ -0,0 +1,143 @@
+"""
+Sessionization of single page-view hits.
+
+Each (domain, ip) has at most one open session in Redis: a hash holding the pathname, when it
+started and was last seen, the longest time spent the client reported and the buttons clicked. A
+hit on the same pathname within ANALYTICS_SESSION_IDLE_SECONDS extends the session. A hit on
+another pathname, or after the idle timeout, closes it and opens a new one. A beat task closes
+sessions whose deadline has passed.
+
+A closed session becomes one `page_view` event on the analytics stream, so the stream consumers
+store it, in batches, like any other event. Every hit is a single script call, whatever the traffic.
+"""
+import time
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+from src.apps.analytics.stream import STREAM_KEY, ingest_stats
+from src.config.settings import Config
+from src.db.redis import redis_client
+from src.errors import AnalyticsBackpressure
+
+SESSION_PREFIX = "analytics:session"
+DEADLINES_KEY = "analytics:sessions:deadlines"
+
+# Moves a session onto the stream as a page_view event and deletes it. Returns false, leaving the
+# session open, when the stream is full. The event JSON is assembled by hand because cjson encodes an
+# empty table as an object, and `buttons` must be a list.
+CLOSE_SESSION_LUA = """
+local function close_session(key, stream, max_length)
+    local s = redis.call('HMGET', key, 'domain', 'ip', 'pathname', 'startedAt', 'lastSeen', 'timeSpent', 'buttons')
+    if not s[1] then
+        return true
+    end
+    if redis.call('XLEN', stream) >= max_length then
+        return false
+    end
+    local time_spent = math.max(tonumber(s[6]), math.floor((tonumber(s[5]) - tonumber(s[4])) / 1000))
+    local event = '{"type":"page_view","pathname":' .. cjson.encode(s[3]) ..
+        ',"ip":' .. cjson.encode(s[2]) ..
+        ',"timeSpendInSeconds":' .. string.format('%d', time_spent) ..
+        ',"buttons":[' .. s[7] .. ']' ..
+        ',"occurredAt":' .. string.format('%.3f', tonumber(s[4]) / 1000) .. '}'
+    redis.call('XADD', stream, '*', 'domain', s[1], 'event', event)
+    redis.call('DEL', key)
+    return true
+end
+"""
+
+# Records one hit.
+#   KEYS: session, deadlines, stream
+#   ARGV: now (ms), idle timeout (ms), stream max length, domain, ip, pathname, time spent (s), button
+#   Returns: 1, or 0 when the previous session could not be closed because the stream is full
+TOUCH_SESSION_SCRIPT = CLOSE_SESSION_LUA + """
+local now = tonumber(ARGV[1])
+local open = redis.call('HMGET', KEYS[1], 'pathname', 'lastSeen')
+if open[1] and (open[1] ~= ARGV[6] or now - tonumber(open[2]) >= tonumber(ARGV[2])) then
+    if not close_session(KEYS[1], KEYS[3], tonumber(ARGV[3])) then
+        return 0
+    end
+    open[1] = false
+end
+if not open[1] then
+    redis.call('HSET', KEYS[1], 'domain', ARGV[4], 'ip', ARGV[5], 'pathname', ARGV[6],
+        'startedAt', ARGV[1], 'timeSpent', 0, 'buttons', '')
+end
+redis.call('HSET', KEYS[1], 'lastSeen', ARGV[1])
+if tonumber(ARGV[7]) > tonumber(redis.call('HGET', KEYS[1], 'timeSpent')) then
+    redis.call('HSET', KEYS[1], 'timeSpent', ARGV[7])
+end
+if ARGV[8] ~= '' then
+    local buttons = redis.call('HGET', KEYS[1], 'buttons')
+    local button = cjson.encode(ARGV[8])
+    if buttons ~= '' then
+        button = buttons .. ',' .. button
+    end
+    redis.call('HSET', KEYS[1], 'buttons', button)
+end
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[2]), KEYS[1])
+return 1
+"""
+
+# Closes sessions whose idle deadline has passed. The session keys come from the sorted set, so
+# they are not declared in KEYS; this assumes a single Redis node, like the rest of the app.
+#   KEYS: deadlines, stream
+#   ARGV: now (ms), batch size, stream max length
+#   Returns: the number of sessions closed
+CLOSE_IDLE_SESSIONS_SCRIPT = CLOSE_SESSION_LUA + """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local closed = 0
+for _, key in ipairs(due) do
+    if not close_session(key, KEYS[2], tonumber(ARGV[3])) then
+        break
+    end
+    redis.call('ZREM', KEYS[1], key)
+    closed = closed + 1
+end
+return closed
+"""
+
+touch_session_script = redis_client.register_script(TOUCH_SESSION_SCRIPT)
+close_idle_sessions_script = redis_client.register_script(CLOSE_IDLE_SESSIONS_SCRIPT)
+
+
+def session_key(domain: str, ip: str) -> str:
+    return f"{SESSION_PREFIX}:{domain}:{ip}"
+
+
+async def touch_session(domain: str, ip: str, pathname: str, time_spent: int = 0, button: Optional[str] = None) -> None:
+    """Records a hit, or raises `AnalyticsBackpressure` when it would close a session onto a full stream."""
+    recorded = await touch_session_script(
+        keys=[session_key(domain, ip), DEADLINES_KEY, STREAM_KEY],
+        args=[
+            int(time.time() * 1000),
+            Config.ANALYTICS_SESSION_IDLE_SECONDS * 1000,
+            Config.ANALYTICS_STREAM_MAX_LENGTH,
+            domain,
+            ip,
+            pathname,
+            max(time_spent, 0),
+            button or "",
+        ],
+    )
+    if not recorded:
+        ingest_stats["rejected"] += 1
+        raise AnalyticsBackpressure()
+    ingest_stats["recorded"] += 1
+
+
+async def close_idle_sessions(client: aioredis.Redis, time_budget: float) -> dict:
+    """Closes idle sessions in batches until none are due, the stream is full, or the time budget runs out."""
+    started_at = time.monotonic()
+    closed = 0
+    while time.monotonic() - started_at < time_budget:
+        batch_closed = await close_idle_sessions_script(
+            keys=[DEADLINES_KEY, STREAM_KEY],
+            args=[int(time.time() * 1000), Config.ANALYTICS_STREAM_BATCH, Config.ANALYTICS_STREAM_MAX_LENGTH],
+            client=client,
+        )
+        closed += batch_closed
+        if batch_closed < Config.ANALYTICS_STREAM_BATCH:
+            break
+    return {"closed": closed, "open": await client.zcard(DEADLINES_KEY)}
@@ -0,0 +1,194 @@
+"""
+Write-behind buffer for analytics events.
+
+Closed page-view sessions (see sessions.py) are appended to a Redis Stream; a Celery consumer
+group drains the stream into Postgres in batches. Delivery is at-least-once: entries are
+acknowledged only after their batch commits, entries left pending by a crashed consumer are
+reclaimed with XAUTOCLAIM, and entries that keep failing are moved to a dead-letter stream.
+"""
+import os
+import socket
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import redis.asyncio as aioredis
+from pydantic import TypeAdapter, ValidationError
+from redis.exceptions import ResponseError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.apps.analytics.counters import count_events
+from src.apps.analytics.schemas import AnalyticsEvent
+from src.apps.analytics.services import AnalyticsService
+from src.config.settings import Config
+from src.db.db import task_session
+from src.db.redis import redis_client
+from src.utils.logger import LOGGER
+
+STREAM_KEY = "analytics:events"
+DEAD_LETTER_KEY = "analytics:events:dead"
+METRICS_KEY = "analytics:events:metrics"
+CONSUMER_GROUP = "analytics-writers"
+
+event_adapter = TypeAdapter(AnalyticsEvent)
+analytics_service = AnalyticsService()
+
+# Hits recorded by touch_session, and those refused because closing a session met a full stream
+ingest_stats: Dict[str, int] = {"recorded": 0, "rejected": 0}
+
+
+async def stream_stats() -> dict:
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.xlen(STREAM_KEY)
+        pipe.xlen(DEAD_LETTER_KEY)
+        pipe.hgetall(METRICS_KEY)
+        length, dead_letters, metrics = await pipe.execute()
+
+    try:
+        groups = await redis_client.xinfo_groups(STREAM_KEY)
+    except ResponseError:
+        groups = []
+    group = next((g for g in groups if _text(g.get("name")) == CONSUMER_GROUP), {})
+
+    return {
+        "length": length,
+        "max_length": Config.ANALYTICS_STREAM_MAX_LENGTH,
+        "pending": group.get("pending"),
+        "lag": group.get("lag"),
+        "consumers": group.get("consumers"),
+        "dead_letters": dead_letters,
+        "ingest": dict(ingest_stats),
+        "consumer": {_text(k): int(v) for k, v in metrics.items()},
+    }
+
+
+def _text(value) -> Optional[str]:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class StreamConsumer:
+    """One drain run of the consumer group, on its own Redis connection and event loop."""
+
+    def __init__(self, client: aioredis.Redis):
+        self.client = client
+        self.name = f"{socket.gethostname()}-{os.getpid()}"
+
+    async def ensure_group(self) -> None:
+        try:
+            await self.client.xgroup_create(STREAM_KEY, CONSUMER_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def read_batch(self) -> List[tuple[bytes, dict]]:
+        # Entries another consumer took but never acknowledged come first
+        _, claimed, *_ = await self.client.xautoclaim(
+            STREAM_KEY, CONSUMER_GROUP, self.name,
+            min_idle_time=Config.ANALYTICS_STREAM_CLAIM_IDLE_MS, start_id="0-0", count=Config.ANALYTICS_STREAM_BATCH,
+        )
+        claimed = [(entry_id, fields) for entry_id, fields in claimed if fields]
+        if claimed:
+            return claimed
+
+        response = await self.client.xreadgroup(
+            CONSUMER_GROUP, self.name, {STREAM_KEY: ">"}, count=Config.ANALYTICS_STREAM_BATCH
+        )
+        return response[0][1] if response else []
+
+    async def acknowledge(self, entry_ids: List[bytes]) -> None:
+        if not entry_ids:
+            return
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.xack(STREAM_KEY, CONSUMER_GROUP, *entry_ids)
+            pipe.xdel(STREAM_KEY, *entry_ids)
+            await pipe.execute()
+
+    async def dead_letter(self, entries: List[tuple[bytes, dict]], reason: str) -> None:
+        if not entries:
+            return
+        async with self.client.pipeline(transaction=True) as pipe:
+            for entry_id, fields in entries:
+                pipe.xadd(DEAD_LETTER_KEY, {**fields, "source_id": entry_id, "reason": reason[:500]})
+            pipe.xack(STREAM_KEY, CONSUMER_GROUP, *[entry_id for entry_id, _ in entries])
+            pipe.xdel(STREAM_KEY, *[entry_id for entry_id, _ in entries])
+            pipe.hincrby(METRICS_KEY, "dead_lettered", len(entries))
+            await pipe.execute()
+        LOGGER.warning(f"Moved {len(entries)} analytics events to {DEAD_LETTER_KEY}: {reason}")
+
+    async def exhausted(self, entries: List[tuple[bytes, dict]]) -> List[tuple[bytes, dict]]:
+        """The entries that have been delivered ANALYTICS_STREAM_MAX_DELIVERIES times already."""
+        ids = sorted(entry_id for entry_id, _ in entries)
+        pending = await self.client.xpending_range(STREAM_KEY, CONSUMER_GROUP, ids[0], ids[-1], len(ids) * 2)
+        deliveries = {p["message_id"]: p["times_delivered"] for p in pending}
+        return [
+            (entry_id, fields)
+            for entry_id, fields in entries
+            if deliveries.get(entry_id, 0) >= Config.ANALYTICS_STREAM_MAX_DELIVERIES
+        ]
+
+    async def count(self, events: List[AnalyticsEvent], domain: str) -> None:
+        # The counters are approximate anyway; losing an update must not redeliver stored events
+        try:
+            await count_events(self.client, domain, "127.0.0.1", events)
+        except Exception as e:
+            LOGGER.warning(f"Could not update analytics counters for {domain}: {e}")
+
+    async def write(self, entries: List[tuple[bytes, dict]], session: AsyncSession) -> int:
+        """Writes one batch, isolating failures per entry. Returns the number of entries stored."""
+        by_domain: Dict[str, list] = defaultdict(list)
+        for entry_id, fields in entries:
+            try:
+                event = event_adapter.validate_json(fields[b"event"])
+            except (KeyError, ValidationError) as e:
+                await self.dead_letter([(entry_id, fields)], str(e))
+                continue
+            by_domain[fields[b"domain"].decode()].append((entry_id, fields, event))
+
+        stored = 0
+        for domain, items in by_domain.items():
+            try:
+                # Every queued event carries the ip it was received from, so the fallback is unused
+                await analytics_service.record_events(domain, "127.0.0.1", [event for _, _, event in items], session)
+            except Exception as e:
+                await session.rollback()
+                LOGGER.warning(f"Analytics batch for {domain} failed, retrying events one by one: {e}")
+            else:
+                await self.acknowledge([entry_id for entry_id, _, _ in items])
+                await self.count([event for _, _, event in items], domain)
+                stored += len(items)
+                continue
+
+            for entry_id, fields, event in items:
+                try:
+                    await analytics_service.record_events(domain, "127.0.0.1", [event], session)
+                except Exception as e:
+                    await session.rollback()
+                    # Left pending so XAUTOCLAIM redelivers it, until it runs out of attempts
+                    await self.dead_letter(await self.exhausted([(entry_id, fields)]), str(e))
+                else:
+                    await self.acknowledge([entry_id])
+                    await self.count([event], domain)
+                    stored += 1
+        return stored
+
+    async def drain(self, time_budget: float) -> dict:
+        await self.ensure_group()
+        started_at = time.monotonic()
+        batches = stored = 0
+        async with task_session() as session:
+            while time.monotonic() - started_at < time_budget:
+                entries = await self.read_batch()
+                if not entries:
+                    break
+                batch_started_at = time.perf_counter()
+                batch_stored = await self.write(entries, session)
+                stored += batch_stored
+                batches += 1
+
+                async with self.client.pipeline(transaction=False) as pipe:
+                    pipe.hincrby(METRICS_KEY, "batches", 1)
+                    pipe.hincrby(METRICS_KEY, "stored", batch_stored)
+                    pipe.hset(METRICS_KEY, "last_batch_ms", int((time.perf_counter() - batch_started_at) * 1000))
+                    pipe.hset(METRICS_KEY, "last_batch_at", int(time.time()))
+                    await pipe.execute()
+        return {"batches": batches, "stored": stored}
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import date
+
+import redis.asyncio as aioredis
+
+from src.apps.analytics.models import AnalyticsRollupState
+from src.apps.analytics.partitions import create_partitions, drop_expired_partitions
+from src.apps.analytics.retention import apply_retention, partition_drop_cutoff
+from src.apps.analytics.rollups import STATE_NAME, refresh_rollups
+from src.apps.analytics.sessions import close_idle_sessions
+from src.apps.analytics.stream import StreamConsumer
+from src.celery_tasks import celery_app
+from src.config.settings import Config, broker_url
+from src.db.db import task_session
+from src.utils.logger import LOGGER
+
+
+async def _maintain_partitions() -> dict:
+    async with task_session() as session:
+        created = await create_partitions(session, Config.PARTITION_MONTHS_AHEAD)
+        removed = []
+        cutoff = partition_drop_cutoff(date.today())
+        state = await session.get(AnalyticsRollupState, STATE_NAME)
+        if cutoff is not None and state is not None:
+            removed = await drop_expired_partitions(session, cutoff, state.watermark, Config.PARTITION_DETACH_ONLY)
+    return {"created": created, "removed": removed}
+
+
+@celery_app.task(name="analytics.maintain_partitions")
+def maintain_partitions() -> dict:
+    """
+    Keeps PARTITION_MONTHS_AHEAD months of partitions ready and removes the months past every domain's
+    retention that the rollups have fully folded in.
+    """
+    result = asyncio.run(_maintain_partitions())
+    LOGGER.info(f"Analytics partitions created: {result['created']}, removed: {result['removed']}")
+    return result
+
+
+async def _drain_events() -> dict:
+    client = aioredis.Redis.from_url(broker_url)
+    try:
+        return await StreamConsumer(client).drain(time_budget=Config.ANALYTICS_STREAM_DRAIN_INTERVAL)
+    finally:
+        await client.aclose()
+
+
+@celery_app.task(name="analytics.drain_events")
+def drain_events() -> dict:
+    """Moves buffered analytics events from the Redis Stream into Postgres."""
+    result = asyncio.run(_drain_events())
+    if result["stored"]:
+        LOGGER.info(f"Stored {result['stored']} analytics events in {result['batches']} batches")
+    return result
+
+
+async def _refresh_rollups() -> dict:
+    async with task_session() as session:
+        return await refresh_rollups(session)
+
+
+@celery_app.task(name="analytics.refresh_rollups")
+def refresh_analytics_rollups() -> dict:
+    """Recomputes the hourly and daily rollup buckets touched since the last run."""
+    result = asyncio.run(_refresh_rollups())
+    LOGGER.info(f"Analytics rollups refreshed: {result}")
+    return result
+
+
+async def _apply_retention() -> dict:
+    async with task_session() as session:
+        return await apply_retention(session)
+
+
+@celery_app.task(name="analytics.apply_retention")
+def apply_analytics_retention() -> dict:
+    """Deletes raw analytics rows past each domain's retention once they are in the rollups."""
+    result = asyncio.run(_apply_retention())
+    for domain, removed in result["domains"].items():
+        LOGGER.info(f"Analytics retention for {domain} removed {removed}")
+    LOGGER.info(
+        f"Analytics retention removed {result['hourly_rollups']} hourly rollups in {result['elapsed_ms']} ms"
+        f"{'' if result['completed'] else ', stopping at its time budget'}"
+    )
+    return result
+
+
+async def _close_sessions() -> dict:
+    client = aioredis.Redis.from_url(broker_url)
+    try:
+        return await close_idle_sessions(client, time_budget=Config.ANALYTICS_SESSION_CLOSE_INTERVAL)
+    finally:
+        await client.aclose()
+
+
+@celery_app.task(name="analytics.close_sessions")
+def close_sessions() -> dict:
+    """Moves sessions idle for ANALYTICS_SESSION_IDLE_SECONDS onto the analytics stream as page views."""
+    result = asyncio.run(_close_sessions())
+    if result["closed"]:
+        LOGGER.info(f"Closed {result['closed']} analytics sessions, {result['open']} still open")
+    return result
@@ -1,36 +1,93 @@
 from datetime import datetime, timedelta
-from typing import Annotated, List, Optional
+from typing import Annotated, List, Literal, Optional
 import uuid
 
-from fastapi import APIRouter, Body, Depends, Path, Request, status
+from fastapi import APIRouter, Body, Depends, Path, Query, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlmodel import paginate
 
+from pydantic import ValidationError
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.apps.accounts.dependencies import get_current_user, get_ip_address
-from src.apps.accounts.models import User
-from src.apps.accounts.schemas import ConflictingIpMessage, DeleteMessage, Message
-from src.apps.analytics.models import Analytics, PageView, ButtonsClicked
-from src.apps.analytics.schemas import AnalyticsRead, CreateOrUpdateAnalytics, CreateOrUpdatePageView
-from src.db.db import get_session
+from src.apps.accounts.schemas import ConflictingIpMessage, DeleteMessage, Message, Principal
+from src.apps.analytics.models import Analytics, PageView
+from src.apps.analytics.export import MEDIA_TYPES, check_format, export_page_views
+from src.apps.analytics.counters import ALL_PATHS, HLL_STANDARD_ERROR, count_events, count_uniques, top_members
+from src.apps.analytics.schemas import (
+    AnalyticsBatchResult,
+    AnalyticsDashboardRow,
+    AnalyticsRead,
+    AnalyticsSummary,
+    CreateOrUpdateAnalytics,
+    CreateOrUpdatePageView,
+    PageViewSummary,
+    QueuedMessage,
+    TopList,
+    UniqueVisitors,
+    analytics_batch_adapter,
+)
+from src.apps.analytics.services import AnalyticsService, _as_utc
+from src.apps.analytics.sessions import touch_session
+from src.db.db import get_read_session, get_session, read_session_factory
+from src.db.pagination import CursorPage, CursorParams, cursor_paginate
+from src.db.redis import redis_client
 from src.apps.accounts.services import UserService
 from src.config.settings import Config
-from src.errors import FAQNotFound, InsufficientPermission
+from src.errors import AnalysisDataUnavailable, FAQNotFound, InsufficientPermission
 from src.utils.logger import LOGGER
 
 session = Annotated[AsyncSession, Depends(get_session)]
 user_service = UserService()
+analytics_service = AnalyticsService()
 analysis_router = APIRouter()
 
-current_time = datetime.utcnow()
-one_hour_ago = current_time - timedelta(hours=1)
-
 @analysis_router.post(
     "",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=QueuedMessage,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": Message},
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_404_NOT_FOUND: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": Message},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"model": Message}
+    }
+)
+async def add_new_analytics(
+    request: Request, form_data: Annotated[CreateOrUpdatePageView, Body(...)], user: Principal = Depends(get_current_user)
+):
+    """
+    Records a hit on the visitor's open session for this pathname. The session is stored as one page
+    view once the visitor moves to another pathname or stays idle for ANALYTICS_SESSION_IDLE_SECONDS.
+    """
+    if not user.isCompany:
+        raise InsufficientPermission()
+
+    domain = request.headers.get("domain")
+    pathname = request.headers.get("pathname") or "/"
+
+    if domain is None:
+        domain = "https://jeremiahedavid.online"
+
+    await touch_session(
+        domain,
+        str(form_data.ip) if form_data.ip else get_ip_address(request),
+        pathname,
+        form_data.timeSpendInSeconds or 0,
+        form_data.buttonsClicked,
+    )
+    return {"message": "Analytics event queued"}
+
+@analysis_router.post(
+    "/batch",
     status_code=status.HTTP_201_CREATED,
-    response_model=AnalyticsRead,
+    response_model=AnalyticsBatchResult,
     responses={
         status.HTTP_400_BAD_REQUEST: {"model": Message},
         status.HTTP_401_UNAUTHORIZED: {"model": Message},
@@ -40,58 +97,249 @@ one_hour_ago = current_time - timedelta(hours=1)
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def add_new_analytics(request: Request, form_data: Annotated[CreateOrUpdatePageView, Body(...)], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def add_analytics_batch(
+    request: Request, user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)
+):
+    """
+    Accepts a JSON array of up to 500 `page_view` and `button_click` events from one beacon flush and
+    stores them in a single transaction.
+    """
     if not user.isCompany:
         raise InsufficientPermission()
 
     domain = request.headers.get("domain")
-    pathname = request.headers.get("pathname")
+    if domain is None:
+        domain = "https://jeremiahedavid.online"
+
+    try:
+        events = analytics_batch_adapter.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
     ip = get_ip_address(request)
+    result = await analytics_service.record_events(domain, ip, events, session)
+    try:
+        await count_events(redis_client, domain, ip, events)
+    except Exception as e:
+        LOGGER.warning(f"Could not update analytics counters for {domain}: {e}")
+    return result
 
+@analysis_router.get(
+    "",
+    status_code=status.HTTP_200_OK,
+    response_model=Page[AnalyticsRead],
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": Message},
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_404_NOT_FOUND: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": Message},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
+    }
+)
+async def get_all_analytics(request: Request, user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+    if not user.isCompany:
+        raise InsufficientPermission()
+
+    domain = request.headers.get("domain")
     if domain is None:
         domain = "https://jeremiahedavid.online"
+    page = await paginate(session, select(Analytics).where(Analytics.domain==domain).order_by(Analytics.createdAt))
+    return page.model_dump()
+
+@analysis_router.get(
+    "/cursor",
+    status_code=status.HTTP_200_OK,
+    response_model=CursorPage[AnalyticsRead],
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": Message},
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_404_NOT_FOUND: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": Message},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
+    }
+)
+async def get_analytics_by_cursor(
+    request: Request,
+    params: CursorParams = Depends(),
+    user: Principal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    if not user.isCompany:
+        raise InsufficientPermission()
+
+    domain = request.headers.get("domain")
+    if domain is None:
+        domain = "https://jeremiahedavid.online"
+    return await cursor_paginate(
+        session,
+        select(Analytics).where(Analytics.domain==domain),
+        [Analytics.createdAt, Analytics.uid],
+        params,
+        AnalyticsRead,
+    )
+
+@analysis_router.get(
+    "/dashboard",
+    status_code=status.HTTP_200_OK,
+    response_model=CursorPage[AnalyticsDashboardRow],
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": Message},
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_404_NOT_FOUND: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": Message},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
+    }
+)
+async def get_analytics_dashboard(
+    request: Request,
+    params: CursorParams = Depends(),
+    user: Principal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    The analytics rows of the domain, newest first, with view, visitor, time and click figures instead
+    of the nested page views. Use `/{uid}/page-views` to drill into one row.
+    """
+    if not user.isCompany:
+        raise InsufficientPermission()
 
-    db_result = await session.exec(select(Analytics).where(Analytics.domain == domain).where(Analytics.createdAt >= one_hour_ago))
-    analytics_exists = db_result.first()
+    domain = request.headers.get("domain")
+    if domain is None:
+        domain = "https://jeremiahedavid.online"
+    return await cursor_paginate(
+        session,
+        analytics_service.dashboard_statement(domain),
+        [Analytics.createdAt.desc(), Analytics.uid.desc()],
+        params,
+        AnalyticsDashboardRow,
+    )
 
-    if analytics_exists is None:
-        new_analytics = Analytics(pathname=pathname, domain=domain)
-        session.add(new_analytics)
+@analysis_router.get(
+    "/{uid}/page-views",
+    status_code=status.HTTP_200_OK,
+    response_model=CursorPage[PageViewSummary],
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": Message},
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_404_NOT_FOUND: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": Message},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
+    }
+)
+async def get_analytics_page_views(
+    request: Request,
+    uid: Annotated[uuid.UUID, Path(title="Unique analytics uid")],
+    params: CursorParams = Depends(),
+    user: Principal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """One analytics row's page views, newest first, a page at a time."""
+    if not user.isCompany:
+        raise InsufficientPermission()
 
-        new_page = PageView(ip=ip, timeSpentInSeconds=form_data.timeSpendInSeconds, analytics=new_analytics, analyticsUid=new_analytics.uid)
-        session.add(new_page)
+    domain = request.headers.get("domain")
+    if domain is None:
+        domain = "https://jeremiahedavid.online"
 
-        new_button = ButtonsClicked(buttonName=form_data.buttonsClicked, pageView=new_page, pageViewUid=new_page.uid)
-        session.add(new_button)
-        await session.commit()
+    db_result = await session.exec(select(Analytics.uid).where(Analytics.uid == uid).where(Analytics.domain == domain))
+    if db_result.first() is None:
+        raise AnalysisDataUnavailable()
+    return await cursor_paginate(
+        session,
+        analytics_service.page_views_statement(uid),
+        [PageView.date.desc(), PageView.uid.desc()],
+        params,
+        PageViewSummary,
+    )
 
-        return new_analytics
+@analysis_router.get(
+    "/summary",
+    status_code=status.HTTP_200_OK,
+    response_model=AnalyticsSummary,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": Message},
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_404_NOT_FOUND: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": Message},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
+    }
+)
+async def get_analytics_summary(
+    request: Request,
+    granularity: Literal["hour", "day"] = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    pathname: Optional[str] = None,
+    user: Principal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    Traffic per hour or per day from the rollup tables, which trail live traffic by about a minute.
+    Defaults to the last 24 hours for hourly buckets and the last 30 days for daily ones.
+    """
+    if not user.isCompany:
+        raise InsufficientPermission()
 
-    db_result = await session.exec(select(PageView).where(PageView.analyticsUid == analytics_exists.uid).where(PageView.date >= one_hour_ago))
-    page_view_exists = db_result.first()
-    if page_view_exists:
-        if form_data.buttonsClicked is not None:
-            new_button = ButtonsClicked(buttonName=form_data.buttonsClicked)
-            await session.add(new_button)
-            await session.commit()
-            await session.refresh(analytics_exists)
+    domain = request.headers.get("domain")
+    if domain is None:
+        domain = "https://jeremiahedavid.online"
 
-        if form_data.ip is not None and form_data.ip != page_view_exists.ip:
-            page_view_exists.ip = form_data.ip
-            await session.commit()
-            await session.refresh(analytics_exists)
+    end = _as_utc(end, datetime.utcnow())
+    start = _as_utc(start, end - (timedelta(hours=24) if granularity == "hour" else timedelta(days=30)))
+    return await analytics_service.summary(domain, granularity, start, end, pathname, session)
 
-        if form_data.timeSpendInSeconds is not None and form_data.timeSpendInSeconds != page_view_exists.timeSpentInSeconds:
-            page_view_exists.timeSpentInSeconds = form_data.timeSpendInSeconds
-            await session.commit()
-            await session.refresh(analytics_exists)
+@analysis_router.get(
+    "/uniques",
+    status_code=status.HTTP_200_OK,
+    response_model=UniqueVisitors,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": Message},
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_404_NOT_FOUND: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": Message},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
+    }
+)
+async def get_unique_visitors(
+    request: Request,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    pathname: Optional[str] = None,
+    user: Principal = Depends(get_current_user),
+):
+    """
+    Approximate distinct visitor IPs for the domain, or one pathname, between `start` and `end`
+    (default: the last 24 hours), at hour resolution. Answered from Redis HyperLogLogs without touching
+    Postgres; the count has a standard error of 0.81%, so about 95% of answers are within 1.6%.
+    """
+    if not user.isCompany:
+        raise InsufficientPermission()
 
+    domain = request.headers.get("domain")
+    if domain is None:
+        domain = "https://jeremiahedavid.online"
 
+    end = _as_utc(end, datetime.utcnow())
+    start = _as_utc(start, end - timedelta(hours=24))
+    pathname = pathname or ALL_PATHS
+    return {
+        "pathname": pathname,
+        "start": start,
+        "end": end,
+        "uniques": await count_uniques(redis_client, domain, pathname, start, end),
+        "standardError": HLL_STANDARD_ERROR,
+    }
 
 @analysis_router.get(
-    "",
+    "/top",
     status_code=status.HTTP_200_OK,
-    response_model=Page[AnalyticsRead],
+    response_model=TopList,
     responses={
         status.HTTP_400_BAD_REQUEST: {"model": Message},
         status.HTTP_401_UNAUTHORIZED: {"model": Message},
@@ -101,13 +349,75 @@ async def add_new_analytics(request: Request, form_data: Annotated[CreateOrUpdat
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def get_all_analytics(request: Request, user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def get_top_analytics(
+    request: Request,
+    kind: Literal["paths", "buttons"] = "paths",
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user: Principal = Depends(get_current_user),
+):
+    """
+    The most viewed pathnames or most clicked buttons between `start` and `end` (default: the last 24
+    hours), at hour resolution, from the Redis leaderboards.
+    """
+    if not user.isCompany:
+        raise InsufficientPermission()
+
+    domain = request.headers.get("domain")
+    if domain is None:
+        domain = "https://jeremiahedavid.online"
+
+    end = _as_utc(end, datetime.utcnow())
+    start = _as_utc(start, end - timedelta(hours=24))
+    members = await top_members(redis_client, domain, kind, start, end, limit)
+    return {
+        "kind": kind,
+        "start": start,
+        "end": end,
+        "items": [{"name": name, "count": count} for name, count in members],
+    }
+
+@analysis_router.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": Message},
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_404_NOT_FOUND: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": Message},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message},
+        status.HTTP_501_NOT_IMPLEMENTED: {"model": Message}
+    }
+)
+async def export_analytics(
+    request: Request,
+    format: Literal["ndjson", "csv", "parquet"] = "ndjson",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user: Principal = Depends(get_current_user),
+):
+    """
+    Streams every page view of the domain with its pathname, optionally limited to [start, end), as
+    NDJSON, CSV or Parquet. The export reads from a server-side cursor and is sent as it is produced.
+    """
     if not user.isCompany:
         raise InsufficientPermission()
 
     domain = request.headers.get("domain")
     if domain is None:
         domain = "https://jeremiahedavid.online"
-    page = await paginate(session, select(Analytics).where(Analytics.domain==domain).order_by(Analytics.createdAt))
-    return page.model_dump()
 
+    check_format(format)
+    start = _as_utc(start, None)
+    end = _as_utc(end, None)
+    # The session is opened inside the stream, since request dependencies close before the body is sent
+    factory = await read_session_factory(request)
+    filename = f"analytics-{datetime.utcnow():%Y%m%d%H%M%S}.{format}"
+    return StreamingResponse(
+        export_page_views(factory, format, domain, start, end),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -2,6 +2,7 @@ from datetime import date, datetime
 from decimal import Decimal
 from pydantic import AnyHttpUrl, EmailStr, FileUrl, IPvAnyAddress
 from sqlmodel import SQLModel, Field, Relationship, Column
+from sqlalchemy import Index
 import sqlalchemy.dialects.postgresql as pg
 import uuid
 
@@ -9,6 +10,7 @@ import uuid
 # User Specific Models
 class FAQs(SQLModel, table=True):
     __tablename__ = "faqs"
+    __table_args__ = (Index("ix_faqs_domain_created_at", "domain", "createdAt"),)
 
     uid: uuid.UUID = Field(
         sa_column=Column(
@@ -10,11 +10,11 @@ from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.apps.accounts.dependencies import get_current_user, get_ip_address
-from src.apps.accounts.models import User
-from src.apps.accounts.schemas import ConflictingIpMessage, DeleteMessage, Message
+from src.apps.accounts.schemas import ConflictingIpMessage, DeleteMessage, Message, Principal
 from src.apps.faqs.models import FAQs
 from src.apps.faqs.schemas import CreateOrUpdateFAQ, ReadFAQ
-from src.db.db import get_session
+from src.db.db import get_read_session, get_session
+from src.db.pagination import CursorPage, CursorParams, cursor_paginate
 from src.apps.accounts.services import UserService
 from src.config.settings import Config
 from src.errors import FAQNotFound, InsufficientPermission
@@ -37,7 +37,7 @@ faq_router = APIRouter()
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def add_new_faq(request: Request, form_data: Annotated[CreateOrUpdateFAQ, Body(...)], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def add_new_faq(request: Request, form_data: Annotated[CreateOrUpdateFAQ, Body(...)], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
@@ -67,13 +67,36 @@ async def add_new_faq(request: Request, form_data: Annotated[CreateOrUpdateFAQ,
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def get_all_faqs(request: Request, session: AsyncSession = Depends(get_session)):
+async def get_all_faqs(request: Request, session: AsyncSession = Depends(get_read_session)):
     domain = request.headers.get("domain")
     if domain is None:
         domain = "https://jeremiahedavid.online"
     page = await paginate(session, select(FAQs).where(FAQs.domain==domain).order_by(FAQs.question, FAQs.createdAt))
     return page.model_dump()
 
+@faq_router.get(
+    "/cursor",
+    status_code=status.HTTP_200_OK,
+    response_model=CursorPage[ReadFAQ],
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": Message},
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_404_NOT_FOUND: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": Message},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
+    }
+)
+async def get_faqs_by_cursor(
+    request: Request, params: CursorParams = Depends(), session: AsyncSession = Depends(get_read_session)
+):
+    domain = request.headers.get("domain")
+    if domain is None:
+        domain = "https://jeremiahedavid.online"
+    return await cursor_paginate(
+        session, select(FAQs).where(FAQs.domain==domain), [FAQs.question, FAQs.createdAt, FAQs.uid], params, ReadFAQ
+    )
+
 @faq_router.patch(
     "/{uid}",
     status_code=status.HTTP_200_OK,
@@ -87,7 +110,7 @@ async def get_all_faqs(request: Request, session: AsyncSession = Depends(get_ses
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def update_faqs(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique faq uid")], form_data: Annotated[CreateOrUpdateFAQ, Body(...)], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def update_faqs(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique faq uid")], form_data: Annotated[CreateOrUpdateFAQ, Body(...)], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
@@ -126,7 +149,7 @@ async def update_faqs(request: Request, uid: Annotated[uuid.UUID, Path(title="Un
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def delete_faq(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique faq uid")], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def delete_faq(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique faq uid")], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
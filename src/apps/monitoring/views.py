@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, Request, status
+
+from src.apps.accounts.dependencies import get_current_user
+from src.apps.accounts.schemas import ConflictingIpMessage, Message, Principal
+from src.apps.accounts.throttling import throttle_stats
+from src.apps.analytics.stream import stream_stats
+from src.db.db import get_pool_stats
+from src.db.instrumentation import route_query_stats
+from src.db.redis import jti_mirror
+from src.errors import InsufficientPermission
+from src.utils.hashing import password_hasher, token_cache
+
+monitoring_router = APIRouter()
+
+
+@monitoring_router.get(
+    "/auth",
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
+    }
+)
+async def auth_stats(request: Request, user: Principal = Depends(get_current_user)):
+    if not user.isSuperuser:
+        raise InsufficientPermission()
+
+    return {
+        "token_cache": token_cache.stats(),
+        "jti_mirror": {"ready": jti_mirror.ready, "size": len(jti_mirror)},
+        "password_hashing": password_hasher.stats(),
+        "throttling": dict(throttle_stats),
+    }
+
+
+@monitoring_router.get(
+    "/db",
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
+    }
+)
+async def db_stats(request: Request, user: Principal = Depends(get_current_user)):
+    if not user.isSuperuser:
+        raise InsufficientPermission()
+
+    return get_pool_stats()
+
+
+@monitoring_router.get(
+    "/queries",
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
+    }
+)
+async def query_stats(request: Request, user: Principal = Depends(get_current_user)):
+    if not user.isSuperuser:
+        raise InsufficientPermission()
+
+    routes = sorted(route_query_stats.items(), key=lambda item: item[1].queries, reverse=True)
+    return {route: stats.snapshot() for route, stats in routes}
+
+
+@monitoring_router.get(
+    "/analytics-stream",
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
+    }
+)
+async def analytics_stream_stats(request: Request, user: Principal = Depends(get_current_user)):
+    if not user.isSuperuser:
+        raise InsufficientPermission()
+
+    return await stream_stats()
@@ -3,6 +3,7 @@ from decimal import Decimal
 from typing import List, Optional
 from pydantic import AnyHttpUrl, EmailStr, FileUrl, IPvAnyAddress
 from sqlmodel import SQLModel, Field, Relationship, Column
+from sqlalchemy import Index
 import sqlalchemy.dialects.postgresql as pg
 import uuid
 
@@ -15,6 +16,7 @@ class ProjectStacksLink(SQLModel, table=True):
 
 class Projects(SQLModel, table=True):
     __tablename__ = "projects"
+    __table_args__ = (Index("ix_projects_domain_created_at", "domain", "createdAt"),)
 
     uid: uuid.UUID = Field(
         sa_column=Column(
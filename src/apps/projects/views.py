@@ -10,13 +10,13 @@ from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.apps.accounts.dependencies import get_current_user, get_ip_address
-from src.apps.accounts.models import User
-from src.apps.accounts.schemas import ConflictingIpMessage, DeleteMessage, Message
+from src.apps.accounts.schemas import ConflictingIpMessage, DeleteMessage, Message, Principal
 from src.apps.projects.models import Projects, ProjectImages, ProjectStacks, ProjectStacksLink
 from src.apps.projects.schemas import CreateOrUpdateProjectImages, CreateOrUpdateProjects, CreateOrUpdateProjectStacks, ProjectsRead, UpdateProjects
 from src.apps.projects.service import createImageUrl
 from src.db.cloudinary import upload_image
-from src.db.db import get_session
+from src.db.db import get_read_session, get_session
+from src.db.pagination import CursorPage, CursorParams, cursor_paginate
 from src.apps.accounts.services import UserService
 from src.config.settings import Config
 from src.errors import FAQNotFound, InsufficientPermission, ProjectNotFound
@@ -44,7 +44,7 @@ async def add_new_projects(
     request: Request,
     background_tasks: BackgroundTasks,
     formData: CreateOrUpdateProjects,  # File upload for images
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
     if not user.isCompany:
@@ -112,13 +112,40 @@ async def add_new_projects(
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def get_all_projects(request: Request, session: AsyncSession = Depends(get_session)):
+async def get_all_projects(request: Request, session: AsyncSession = Depends(get_read_session)):
     domain = request.headers.get("domain")
     if domain is None:
         domain = "https://jeremiahedavid.online"
     page = await paginate(session, select(Projects).where(Projects.domain==domain).order_by(Projects.name, Projects.createdAt))
     return page.model_dump()
 
+@project_router.get(
+    "/cursor",
+    status_code=status.HTTP_200_OK,
+    response_model=CursorPage[ProjectsRead],
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": Message},
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_404_NOT_FOUND: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": Message},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
+    }
+)
+async def get_projects_by_cursor(
+    request: Request, params: CursorParams = Depends(), session: AsyncSession = Depends(get_read_session)
+):
+    domain = request.headers.get("domain")
+    if domain is None:
+        domain = "https://jeremiahedavid.online"
+    return await cursor_paginate(
+        session,
+        select(Projects).where(Projects.domain==domain),
+        [Projects.name, Projects.createdAt, Projects.uid],
+        params,
+        ProjectsRead,
+    )
+
 @project_router.patch(
     "/{uid}",
     status_code=status.HTTP_200_OK,
@@ -132,7 +159,7 @@ async def get_all_projects(request: Request, session: AsyncSession = Depends(get
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def update_project(request: Request, background_tasks: BackgroundTasks, uid: Annotated[uuid.UUID, Path(title="Unique project uid")], form_data: UpdateProjects, user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def update_project(request: Request, background_tasks: BackgroundTasks, uid: Annotated[uuid.UUID, Path(title="Unique project uid")], form_data: UpdateProjects, user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
@@ -212,7 +239,7 @@ async def update_project(request: Request, background_tasks: BackgroundTasks, ui
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def delete_project(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique project uid")], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def delete_project(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique project uid")], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
@@ -5,6 +5,7 @@ from pydantic import AnyHttpUrl, EmailStr, FileUrl, IPvAnyAddress
 from pydantic_extra_types.phone_numbers import PhoneNumber
 
 from sqlmodel import SQLModel, Field, Relationship, Column
+from sqlalchemy import Index
 import sqlalchemy.dialects.postgresql as pg
 import uuid
 
@@ -16,6 +17,7 @@ class ServiceRequestLink(SQLModel, table=True):
 
 class Services(SQLModel, table=True):
     __tablename__ = "services"
+    __table_args__ = (Index("ix_services_domain_created_at", "domain", "createdAt"),)
 
     uid: uuid.UUID = Field(
         sa_column=Column(
@@ -71,6 +73,7 @@ class ServiceFeatures(SQLModel, table=True):
 
 class RequestedServices(SQLModel, table=True):
     __tablename__ = "requested_services"
+    __table_args__ = (Index("ix_requested_services_domain_created_at", "domain", "createdAt"),)
 
     uid: uuid.UUID = Field(
         sa_column=Column(
@@ -11,8 +11,7 @@ from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.apps.accounts.dependencies import get_current_user, get_ip_address
-from src.apps.accounts.models import User
-from src.apps.accounts.schemas import ConflictingIpMessage, DeleteMessage, Message
+from src.apps.accounts.schemas import ConflictingIpMessage, DeleteMessage, Message, Principal
 from src.apps.projects.models import Projects, ProjectImages, ProjectStacks, ProjectStacksLink
 from src.apps.projects.schemas import CreateOrUpdateProjectImages, CreateOrUpdateProjects, CreateOrUpdateProjectStacks, ProjectsRead, UpdateProjects
 from src.apps.projects.service import createImageUrl
@@ -20,7 +19,8 @@ from src.apps.requests.models import Milestones, RequestedServices, ServiceFeatu
 from src.apps.requests.schemas import CreateOrUpdateMilestones, CreateOrUpdateService, CreateOrUpdateServiceFeatures, CreateRequestedServices, RequestedServicesRead, ServicesRead, UpdateRequestedServices
 from src.apps.requests.services import createFeatureImageUrl, get_random_decimal
 from src.db.cloudinary import upload_image
-from src.db.db import get_session
+from src.db.db import get_read_session, get_session
+from src.db.pagination import CursorPage, CursorParams, cursor_paginate
 from src.apps.accounts.services import UserService
 from src.config.settings import Config
 from src.errors import FAQNotFound, InsufficientPermission, MilestoneNotFound, ProjectNotFound, RequestNotFound, ServiceNotFound
@@ -45,7 +45,7 @@ request_router = APIRouter()
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def add_new_service(request: Request, background_tasks: BackgroundTasks, form_data: Annotated[CreateOrUpdateService, Body(...)], features_data: Annotated[List[CreateOrUpdateServiceFeatures], Body(...)], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def add_new_service(request: Request, background_tasks: BackgroundTasks, form_data: Annotated[CreateOrUpdateService, Body(...)], features_data: Annotated[List[CreateOrUpdateServiceFeatures], Body(...)], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
@@ -83,7 +83,7 @@ async def add_new_service(request: Request, background_tasks: BackgroundTasks, f
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def get_all_services(request: Request, session: AsyncSession = Depends(get_session)):
+async def get_all_services(request: Request, session: AsyncSession = Depends(get_read_session)):
     domain = request.headers.get("domain")
     if domain is None:
         domain = "https://jeremiahedavid.online"
@@ -103,7 +103,7 @@ async def get_all_services(request: Request, session: AsyncSession = Depends(get
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def update_service(request: Request, background_tasks: BackgroundTasks, uid: Annotated[uuid.UUID, Path(title="Unique service uid")], form_data: CreateOrUpdateService, user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def update_service(request: Request, background_tasks: BackgroundTasks, uid: Annotated[uuid.UUID, Path(title="Unique service uid")], form_data: CreateOrUpdateService, user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
@@ -143,7 +143,7 @@ async def update_service(request: Request, background_tasks: BackgroundTasks, ui
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def add_new_or_update_features(request: Request, background_tasks: BackgroundTasks, uid: Annotated[uuid.UUID, Path(title="Unique service uid")], form_data: Annotated[CreateOrUpdateServiceFeatures, Body(...)], featureUid: Annotated[Optional[uuid.UUID|str], Path(title="Unique feature uid|str")], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def add_new_or_update_features(request: Request, background_tasks: BackgroundTasks, uid: Annotated[uuid.UUID, Path(title="Unique service uid")], form_data: Annotated[CreateOrUpdateServiceFeatures, Body(...)], featureUid: Annotated[Optional[uuid.UUID|str], Path(title="Unique feature uid|str")], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
@@ -192,7 +192,7 @@ async def add_new_or_update_features(request: Request, background_tasks: Backgro
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def delete_service(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique service uid")], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def delete_service(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique service uid")], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
@@ -262,13 +262,45 @@ async def create_new_request(request: Request, form_data: Annotated[CreateReques
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def get_all_requests(request: Request, session: AsyncSession = Depends(get_session)):
+async def get_all_requests(request: Request, session: AsyncSession = Depends(get_read_session)):
     domain = request.headers.get("domain")
     if domain is None:
         domain = "https://jeremiahedavid.online"
-    page = await paginate(session, select(RequestedServices).where(RequestedServices.domain == domain).order_by(RequestedServices.createdAt.dsc()))
+    page = await paginate(
+        session,
+        select(RequestedServices)
+        .where(RequestedServices.domain == domain)
+        .order_by(RequestedServices.createdAt.desc()),
+    )
     return page.model_dump()
 
+@request_router.get(
+    "/cursor",
+    status_code=status.HTTP_200_OK,
+    response_model=CursorPage[RequestedServicesRead],
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": Message},
+        status.HTTP_401_UNAUTHORIZED: {"model": Message},
+        status.HTTP_404_NOT_FOUND: {"model": Message},
+        status.HTTP_407_PROXY_AUTHENTICATION_REQUIRED: {"model": ConflictingIpMessage},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": Message},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
+    }
+)
+async def get_requests_by_cursor(
+    request: Request, params: CursorParams = Depends(), session: AsyncSession = Depends(get_read_session)
+):
+    domain = request.headers.get("domain")
+    if domain is None:
+        domain = "https://jeremiahedavid.online"
+    return await cursor_paginate(
+        session,
+        select(RequestedServices).where(RequestedServices.domain == domain),
+        [RequestedServices.createdAt.desc(), RequestedServices.uid.desc()],
+        params,
+        RequestedServicesRead,
+    )
+
 @request_router.patch(
     "/{uid}",
     status_code=status.HTTP_200_OK,
@@ -282,7 +314,7 @@ async def get_all_requests(request: Request, session: AsyncSession = Depends(get
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def update_request(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique request uid")], form_data: UpdateRequestedServices, user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def update_request(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique request uid")], form_data: UpdateRequestedServices, user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
@@ -320,7 +352,7 @@ async def update_request(request: Request, uid: Annotated[uuid.UUID, Path(title=
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def add_milestones_to_request(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique request uid")], form_data: CreateOrUpdateMilestones, user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def add_milestones_to_request(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique request uid")], form_data: CreateOrUpdateMilestones, user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
@@ -355,7 +387,7 @@ async def add_milestones_to_request(request: Request, uid: Annotated[uuid.UUID,
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def update_milestones_for_a_request(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique request uid")], milestoneUid: Annotated[uuid.UUID, Path(title="Unique milestone uid")], form_data: CreateOrUpdateMilestones, user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def update_milestones_for_a_request(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique request uid")], milestoneUid: Annotated[uuid.UUID, Path(title="Unique milestone uid")], form_data: CreateOrUpdateMilestones, user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
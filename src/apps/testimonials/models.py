@@ -3,6 +3,7 @@ from decimal import Decimal
 from typing import Optional
 from pydantic import AnyHttpUrl, EmailStr, FileUrl, IPvAnyAddress
 from sqlmodel import SQLModel, Field, Relationship, Column
+from sqlalchemy import Index
 import sqlalchemy.dialects.postgresql as pg
 import uuid
 
@@ -10,6 +11,7 @@ import uuid
 # User Specific Models
 class Testimonial(SQLModel, table=True):
     __tablename__ = "testimonials"
+    __table_args__ = (Index("ix_testimonials_domain_created_at", "domain", "createdAt"),)
 
     uid: uuid.UUID = Field(
         sa_column=Column(
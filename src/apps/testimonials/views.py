@@ -10,12 +10,11 @@ from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.apps.accounts.dependencies import get_current_user, get_ip_address
-from src.apps.accounts.models import User
-from src.apps.accounts.schemas import ConflictingIpMessage, DeleteMessage, Message
+from src.apps.accounts.schemas import ConflictingIpMessage, DeleteMessage, Message, Principal
 from src.apps.testimonials.models import Testimonial
 from src.apps.testimonials.schemas import CreateOrUpdateTestimonial, ReadTestimonial
 from src.apps.testimonials.service import createImageUrl
-from src.db.db import get_session
+from src.db.db import get_read_session, get_session
 from src.apps.accounts.services import UserService
 from src.config.settings import Config
 from src.errors import FAQNotFound, InsufficientPermission, TestimonialNotFound
@@ -38,7 +37,7 @@ testimonial_router = APIRouter()
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def add_new_testimonial(request: Request, background_tasks: BackgroundTasks, form_data: Annotated[CreateOrUpdateTestimonial, Body(...)], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def add_new_testimonial(request: Request, background_tasks: BackgroundTasks, form_data: Annotated[CreateOrUpdateTestimonial, Body(...)], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
@@ -71,7 +70,7 @@ async def add_new_testimonial(request: Request, background_tasks: BackgroundTask
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def get_all_testimonial(request: Request, session: AsyncSession = Depends(get_session)):
+async def get_all_testimonial(request: Request, session: AsyncSession = Depends(get_read_session)):
     domain = request.headers.get("domain")
     if domain is None:
         domain = "https://jeremiahedavid.online"
@@ -91,7 +90,7 @@ async def get_all_testimonial(request: Request, session: AsyncSession = Depends(
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def update_testimonial(request: Request, background_tasks: BackgroundTasks, uid: Annotated[uuid.UUID, Path(title="Unique faq uid")], form_data: Annotated[CreateOrUpdateTestimonial, Body(...)], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def update_testimonial(request: Request, background_tasks: BackgroundTasks, uid: Annotated[uuid.UUID, Path(title="Unique faq uid")], form_data: Annotated[CreateOrUpdateTestimonial, Body(...)], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
@@ -134,7 +133,7 @@ async def update_testimonial(request: Request, background_tasks: BackgroundTasks
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
     }
 )
-async def delete_testimonial(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique faq uid")], user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def delete_testimonial(request: Request, uid: Annotated[uuid.UUID, Path(title="Unique faq uid")], user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     if not user.isCompany:
         raise InsufficientPermission()
 
@@ -1,5 +1,6 @@
 import asyncio
 from celery import Celery
+from celery.schedules import crontab
 from src.config.settings import Config
 from src.utils.logger import LOGGER
 
@@ -12,6 +13,27 @@ celery_app = Celery(
 celery_app.config_from_object(Config)
 
 # Autodiscover tasks from all installed apps (each app should have a 'tasks.py' file)
-celery_app.autodiscover_tasks(packages=['src.apps.accounts'], related_name='tasks')
-
+celery_app.autodiscover_tasks(packages=['src.apps.accounts', 'src.apps.analytics'], related_name='tasks')
 
+celery_app.conf.beat_schedule = {
+    "analytics-maintain-partitions": {
+        "task": "analytics.maintain_partitions",
+        "schedule": crontab(minute=0, hour=3),
+    },
+    "analytics-drain-events": {
+        "task": "analytics.drain_events",
+        "schedule": Config.ANALYTICS_STREAM_DRAIN_INTERVAL,
+    },
+    "analytics-refresh-rollups": {
+        "task": "analytics.refresh_rollups",
+        "schedule": Config.ANALYTICS_ROLLUP_INTERVAL,
+    },
+    "analytics-close-sessions": {
+        "task": "analytics.close_sessions",
+        "schedule": Config.ANALYTICS_SESSION_CLOSE_INTERVAL,
+    },
+    "analytics-apply-retention": {
+        "task": "analytics.apply_retention",
+        "schedule": crontab(minute=30, hour=3),
+    },
+}
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 BASE_URL = Path(__file__).resolve().parent.parent.parent
@@ -12,6 +12,67 @@ class BaseConfig(BaseSettings):
     APP_DIR: Optional[Path] = BASE_DIR / 'src/apps'
     VERSION: Optional[str] = "v1"
     ACCESS_TOKEN_EXPIRY: Optional[int] = 1800
+    TOKEN_CACHE_SIZE: Optional[int] = 10000
+    REDIS_POOL_SIZE: Optional[int] = 50
+    REDIS_POOL_TIMEOUT: Optional[float] = 2
+    REDIS_SOCKET_TIMEOUT: Optional[float] = 5
+    REDIS_CONNECT_TIMEOUT: Optional[float] = 2
+    REDIS_HEALTH_CHECK_INTERVAL: Optional[int] = 30
+    JTI_BLOOM_CAPACITY: Optional[int] = 100000
+    PRINCIPAL_CACHE_SIZE: Optional[int] = 10000
+    PRINCIPAL_CACHE_TTL: Optional[int] = 60
+    IP_INDEX_TTL: Optional[int] = 86400
+    HASH_POOL_WORKERS: Optional[int] = None
+    HASH_MAX_CONCURRENCY: Optional[int] = None
+    HASH_MAX_QUEUE: Optional[int] = 64
+    PASSWORD_HASH_SCHEMES: Optional[list[str]] = ["bcrypt"]
+    BCRYPT_ROUNDS: Optional[int] = 12
+    ARGON2_TIME_COST: Optional[int] = 3
+    ARGON2_MEMORY_COST: Optional[int] = 65536
+    ARGON2_PARALLELISM: Optional[int] = 4
+    GEOIP_DATABASE_PATH: Optional[str] = None
+    GEOIP_HTTP_FALLBACK: Optional[bool] = True
+    GEOIP_CACHE_SIZE: Optional[int] = 10000
+    GEOIP_FAILURE_TTL: Optional[float] = 60
+    THROTTLE_PERIOD: Optional[int] = 300
+    THROTTLE_LOGIN_PER_IP: Optional[int] = 20
+    THROTTLE_LOGIN_PER_EMAIL: Optional[int] = 5
+    THROTTLE_SIGNUP_PER_IP: Optional[int] = 5
+    THROTTLE_SIGNUP_PER_EMAIL: Optional[int] = 5
+    DB_ECHO: Optional[bool] = None
+    DB_POOL_SIZE: Optional[int] = 10
+    DB_MAX_OVERFLOW: Optional[int] = 10
+    DB_POOL_TIMEOUT: Optional[float] = 30
+    DB_POOL_RECYCLE: Optional[int] = 1800
+    DB_POOL_PRE_PING: Optional[bool] = True
+    DB_STATEMENT_CACHE_SIZE: Optional[int] = 100
+    DATABASE_REPLICA_URL: Optional[str] = None
+    REPLICA_HEALTH_INTERVAL: Optional[float] = 10
+    REPLICA_MAX_LAG: Optional[float] = 5
+    REPLICA_STICKY_SECONDS: Optional[int] = 10
+    SLOW_QUERY_MS: Optional[float] = 200
+    N_PLUS_ONE_THRESHOLD: Optional[int] = 5
+    PARTITION_MONTHS_AHEAD: Optional[int] = 3
+    PARTITION_DETACH_ONLY: Optional[bool] = True
+    ANALYTICS_EVENT_MAX_AGE_SECONDS: Optional[int] = 86400
+    ANALYTICS_EVENT_MAX_SKEW_SECONDS: Optional[int] = 300
+    ANALYTICS_STREAM_MAX_LENGTH: Optional[int] = 100000
+    ANALYTICS_STREAM_BATCH: Optional[int] = 500
+    ANALYTICS_STREAM_CLAIM_IDLE_MS: Optional[int] = 60000
+    ANALYTICS_STREAM_MAX_DELIVERIES: Optional[int] = 5
+    ANALYTICS_STREAM_DRAIN_INTERVAL: Optional[float] = 5
+    ANALYTICS_ROLLUP_INTERVAL: Optional[float] = 60
+    ANALYTICS_COUNTERS_HOURLY_TTL_DAYS: Optional[int] = 8
+    ANALYTICS_COUNTERS_DAILY_TTL_DAYS: Optional[int] = 400
+    ANALYTICS_TOP_MAX_MEMBERS: Optional[int] = 10000
+    ANALYTICS_EXPORT_CHUNK_ROWS: Optional[int] = 10000
+    ANALYTICS_RETENTION_DAYS: Optional[int] = None
+    ANALYTICS_RETENTION_POLICIES: Optional[Dict[str, int]] = {}
+    ANALYTICS_RETENTION_BATCH: Optional[int] = 5000
+    ANALYTICS_RETENTION_TIME_BUDGET: Optional[float] = 600
+    ANALYTICS_HOURLY_ROLLUP_RETENTION_DAYS: Optional[int] = 90
+    ANALYTICS_SESSION_IDLE_SECONDS: Optional[int] = 1800
+    ANALYTICS_SESSION_CLOSE_INTERVAL: Optional[float] = 30
     RESEND_API: str
 
     CLOUDINARY_CLOUD_NAME: str
@@ -0,0 +1,78 @@
+"""In-process mirror of revoked JWT ids (JTIs)."""
+import hashlib
+import math
+import time
+from typing import Dict, Iterable, Tuple
+
+
+class BloomFilter:
+    """A fixed-size bloom filter using double hashing over a single blake2b digest."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class JtiBlocklistMirror:
+    """
+    Keeps a per-worker copy of the JTI blocklist: a bloom filter answers the common "not revoked"
+    case without touching Redis and an exact set, with per-entry expiry, confirms possible hits.
+
+    The mirror is only trusted while `ready` is set, i.e. after it has been seeded from Redis and
+    while its pub/sub subscription is alive.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.ready = False
+        self._entries: Dict[str, float] = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+
+    def add(self, jti: str, expires_at: float) -> None:
+        if expires_at <= time.time():
+            return
+        self._entries[jti] = expires_at
+        self._bloom.add(jti)
+        if len(self._entries) > self._bloom.capacity:
+            self.prune()
+
+    def load(self, entries: Iterable[Tuple[str, float]]) -> None:
+        self._entries = {}
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        for jti, expires_at in entries:
+            self.add(jti, expires_at)
+
+    def might_contain(self, jti: str) -> bool:
+        return jti in self._bloom
+
+    def contains(self, jti: str) -> bool:
+        expires_at = self._entries.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def prune(self) -> None:
+        """Drops expired JTIs and rebuilds the bloom filter, which cannot forget entries on its own."""
+        now = time.time()
+        self._entries = {jti: expires_at for jti, expires_at in self._entries.items() if expires_at > now}
+        self._bloom = BloomFilter(max(self.capacity, len(self._entries) * 2), self.error_rate)
+        for jti in self._entries:
+            self._bloom.add(jti)
+
+    def __len__(self) -> int:
+        return len(self._entries)
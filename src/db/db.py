@@ -1,25 +1,278 @@
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
-from sqlmodel import SQLModel  # , create_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, SQLModel  # , create_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from src.config.settings import Config
+from src.db.instrumentation import instrument_engine
+from src.db.redis import redis_client
+from src.errors import get_ip_address
+from src.utils.logger import LOGGER
+from src.utils.metrics import Histogram
 
-async_engine = create_async_engine(url=Config.DATABASE_URL, echo=True)
 
+class PoolStats:
+    """Connection pool counters for one engine, fed by pool and session events."""
 
-async def init_db() -> None:
-    async with async_engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
+    def __init__(self, engine: AsyncEngine):
+        # Only the pool is kept, so the stats do not keep their engine alive
+        self.pool = engine.sync_engine.pool
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.wait = Histogram()
 
+    def snapshot(self) -> dict:
+        pool = self.pool
+        stats = {
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "wait": self.wait.snapshot(),
+        }
+        # NullPool (used by Celery tasks) has no size or overflow to report
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, name):
+                stats[name] = getattr(pool, name)()
+        return stats
 
-async def get_session() -> AsyncSession:  # type: ignore
-    Session = sessionmaker(
-        bind=async_engine,
+
+# Keyed by the sync engine; weak so the throwaway engines of Celery tasks do not pile up
+pool_stats: "weakref.WeakKeyDictionary[Engine, PoolStats]" = weakref.WeakKeyDictionary()
+
+
+def create_engine(url: str, null_pool: bool = False) -> AsyncEngine:
+    """
+    Builds an async engine from the DB_* settings. SQL echo is only on in the local environment and
+    asyncpg's prepared statement cache is sized explicitly. `null_pool` opens a fresh connection per
+    checkout, for short-lived event loops such as Celery tasks.
+    """
+    echo = Config.DB_ECHO if Config.DB_ECHO is not None else Config.ENVIRONMENT == "local"
+    kwargs = {"echo": echo, "pool_pre_ping": Config.DB_POOL_PRE_PING}
+
+    if make_url(url).get_driver_name() == "asyncpg":
+        kwargs["connect_args"] = {"statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE}
+
+    if null_pool:
+        kwargs["poolclass"] = NullPool
+    else:
+        kwargs.update(
+            pool_size=Config.DB_POOL_SIZE,
+            max_overflow=Config.DB_MAX_OVERFLOW,
+            pool_timeout=Config.DB_POOL_TIMEOUT,
+            pool_recycle=Config.DB_POOL_RECYCLE,
+        )
+
+    engine = create_async_engine(url, **kwargs)
+    instrument_engine(engine.sync_engine)
+    stats = PoolStats(engine)
+    pool_stats[engine.sync_engine] = stats
+
+    @event.listens_for(engine.sync_engine.pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.checkouts += 1
+
+    @event.listens_for(engine.sync_engine.pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        stats.checkins += 1
+
+    @event.listens_for(engine.sync_engine.pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        stats.connects += 1
+
+    @event.listens_for(engine.sync_engine.pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        stats.invalidations += 1
+
+    return engine
+
+
+class TrackedSession(Session):
+    """
+    Sync half of every request session; records how long each transaction waited for a pooled
+    connection. Subclasses sqlmodel's Session so `AsyncSession.exec` keeps working.
+    """
+
+
+@event.listens_for(TrackedSession, "after_transaction_create")
+def _transaction_created(session, transaction):
+    if transaction.parent is None:
+        session.info["connection_requested_at"] = time.perf_counter()
+
+
+@event.listens_for(TrackedSession, "after_begin")
+def _transaction_began(session, transaction, connection):
+    requested_at = session.info.pop("connection_requested_at", None)
+    stats = pool_stats.get(connection.engine)
+    if requested_at is not None and stats is not None:
+        stats.wait.observe((time.perf_counter() - requested_at) * 1000)
+
+
+def create_session_factory(engine: AsyncEngine) -> sessionmaker:
+    return sessionmaker(
+        bind=engine,
         class_=AsyncSession,
+        sync_session_class=TrackedSession,
         expire_on_commit=False,
         autoflush=False,
         autocommit=False,
     )
 
+
+class ReplicaHealth:
+    """
+    Decides whether reads may go to the replica. The replica is probed at most once per `interval`
+    seconds and counts as unhealthy when it cannot be reached or its replay lag exceeds `max_lag`.
+    """
+
+    def __init__(self, engine: AsyncEngine, interval: float, max_lag: float, timeout: float = 2):
+        self.engine = engine
+        self.interval = interval
+        self.max_lag = max_lag
+        self.timeout = timeout
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _replay_lag(self) -> Optional[float]:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(text("SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"))
+            return result.scalar()
+
+    async def _probe(self) -> bool:
+        try:
+            # Bounds the connect as well as the query, so an unreachable replica cannot hold the lock
+            # (and every read waiting on it) for the pool or connect timeout
+            lag = await asyncio.wait_for(self._replay_lag(), timeout=self.timeout)
+        except Exception as e:
+            LOGGER.warning(f"Read replica unavailable, reading from the primary: {e}")
+            return False
+
+        # NULL when nothing has been replayed yet, e.g. a fresh replica or a primary used as replica
+        self.lag = float(lag) if lag is not None else None
+        if self.lag is not None and self.lag > self.max_lag:
+            LOGGER.warning(f"Read replica is {self.lag:.1f}s behind, reading from the primary")
+            return False
+        return True
+
+    async def is_healthy(self) -> bool:
+        if time.monotonic() - self.checked_at < self.interval:
+            return self.healthy
+        async with self._lock:
+            if time.monotonic() - self.checked_at >= self.interval:
+                self.healthy = await self._probe()
+                self.checked_at = time.monotonic()
+        return self.healthy
+
+
+async_engine = create_engine(Config.DATABASE_URL)
+Session = create_session_factory(async_engine)
+
+replica_engine: Optional[AsyncEngine] = None
+ReadSession: Optional[sessionmaker] = None
+replica_health: Optional[ReplicaHealth] = None
+if Config.DATABASE_REPLICA_URL:
+    replica_engine = create_engine(Config.DATABASE_REPLICA_URL)
+    ReadSession = create_session_factory(replica_engine)
+    replica_health = ReplicaHealth(replica_engine, Config.REPLICA_HEALTH_INTERVAL, Config.REPLICA_MAX_LAG)
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+read_routing = {"replica": 0, "primary_sticky": 0, "primary_fallback": 0}
+
+
+def _sticky_key(ip: str) -> str:
+    return f"db:sticky:{ip}"
+
+
+async def mark_client_wrote(request: Request) -> None:
+    """Pins the client's reads to the primary long enough for the replica to catch up with its write."""
+    try:
+        await redis_client.set(_sticky_key(get_ip_address(request)), 1, ex=Config.REPLICA_STICKY_SECONDS)
+    except Exception as e:
+        LOGGER.warning(f"Could not pin reads to the primary: {e}")
+
+
+async def _client_recently_wrote(request: Request) -> bool:
+    try:
+        return bool(await redis_client.exists(_sticky_key(get_ip_address(request))))
+    except Exception as e:
+        # Without the marker we cannot promise read-your-writes, so stay on the primary
+        LOGGER.warning(f"Could not check read stickiness: {e}")
+        return True
+
+
+async def init_db() -> None:
+    async with async_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+
+async def close_db() -> None:
+    await async_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+
+def get_pool_stats() -> dict:
+    stats = {"primary": pool_stats[async_engine.sync_engine].snapshot()}
+    if replica_engine is not None:
+        stats["replica"] = pool_stats[replica_engine.sync_engine].snapshot()
+        stats["replica"]["healthy"] = replica_health.healthy
+        stats["replica"]["lag_seconds"] = replica_health.lag
+        stats["read_routing"] = dict(read_routing)
+    return stats
+
+
+async def get_session() -> AsyncSession:  # type: ignore
     async with Session() as session:
         yield session
+
+
+@asynccontextmanager
+async def task_session() -> AsyncIterator[AsyncSession]:
+    """
+    Session for Celery tasks. Each task runs its own event loop through asyncio.run, and pooled
+    asyncpg connections cannot cross loops, so this uses a throwaway engine without a pool.
+    """
+    engine = create_engine(Config.DATABASE_URL, null_pool=True)
+    try:
+        async with create_session_factory(engine)() as session:
+            yield session
+    finally:
+        await engine.dispose()
+
+
+async def read_session_factory(request: Request) -> sessionmaker:
+    """
+    The session factory for a read-only request. Uses the replica when one is configured and healthy,
+    unless the client made a write within the last REPLICA_STICKY_SECONDS, in which case it reads its
+    own writes from the primary.
+    """
+    if ReadSession is None:
+        return Session
+    if await _client_recently_wrote(request):
+        read_routing["primary_sticky"] += 1
+    elif not await replica_health.is_healthy():
+        read_routing["primary_fallback"] += 1
+    else:
+        read_routing["replica"] += 1
+        return ReadSession
+    return Session
+
+
+async def get_read_session(request: Request) -> AsyncSession:  # type: ignore
+    """Session for read-only endpoints, routed by `read_session_factory`."""
+    factory = await read_session_factory(request)
+    async with factory() as session:
+        yield session
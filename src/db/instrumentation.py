@@ -0,0 +1,101 @@
+"""Per-request SQL counters, slow query logging and N+1 detection."""
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.config.settings import Config
+from src.utils.logger import LOGGER
+from src.utils.metrics import Histogram
+
+
+class RequestQueries:
+    """Queries run while serving one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.time_ms = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def repeated(self) -> Dict[str, int]:
+        """Statements run at least N_PLUS_ONE_THRESHOLD times, the usual signature of an N+1."""
+        return {statement: n for statement, n in self.statements.items() if n >= Config.N_PLUS_ONE_THRESHOLD}
+
+
+current_queries: ContextVar[Optional[RequestQueries]] = ContextVar("current_queries", default=None)
+
+
+class RouteQueryStats:
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.n_plus_one = 0
+        self.db_time = Histogram()
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "avg_queries": round(self.queries / self.requests, 2) if self.requests else None,
+            "max_queries": self.max_queries,
+            "n_plus_one": self.n_plus_one,
+            "db_time": self.db_time.snapshot(),
+        }
+
+
+route_query_stats: Dict[str, RouteQueryStats] = {}
+# Requests that match no route share one entry, so random 404 paths cannot grow the table
+UNMATCHED_ROUTE = "<unmatched>"
+_route_lock = threading.Lock()
+
+
+def _shorten(statement: str, length: int = 300) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= length else statement[:length] + "..."
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Times every statement on `engine` and charges it to the request being served, if any."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_started_at"].pop()) * 1000
+
+        if elapsed_ms >= Config.SLOW_QUERY_MS:
+            LOGGER.warning(f"Slow query ({elapsed_ms:.1f}ms): {_shorten(statement)}")
+
+        queries = current_queries.get()
+        if queries is not None:
+            queries.count += 1
+            queries.time_ms += elapsed_ms
+            queries.statements[statement] += 1
+
+
+def start_request() -> RequestQueries:
+    queries = RequestQueries()
+    current_queries.set(queries)
+    return queries
+
+
+def finish_request(route: str, queries: RequestQueries) -> None:
+    repeated = queries.repeated()
+    for statement, n in repeated.items():
+        LOGGER.warning(f"Probable N+1 on {route}: statement ran {n} times: {_shorten(statement)}")
+
+    with _route_lock:
+        stats = route_query_stats.get(route)
+        if stats is None:
+            stats = route_query_stats[route] = RouteQueryStats()
+        stats.requests += 1
+        stats.queries += queries.count
+        stats.max_queries = max(stats.max_queries, queries.count)
+        stats.n_plus_one += bool(repeated)
+    stats.db_time.observe(queries.time_ms)
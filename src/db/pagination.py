@@ -0,0 +1,147 @@
+"""Keyset (cursor) pagination for list endpoints."""
+import base64
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Generic, List, Optional, Sequence, Type, TypeVar
+
+from pydantic import BaseModel, Field
+from sqlalchemy import and_, false, or_
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import ColumnElement, UnaryExpression
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.errors import InvalidCursor
+
+T = TypeVar("T")
+
+
+class CursorPage(BaseModel, Generic[T]):
+    items: List[T]
+    size: int
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+class CursorParams(BaseModel):
+    cursor: Optional[str] = Field(default=None, description="Opaque cursor returned as `next_cursor` by the previous page")
+    size: int = Field(default=50, ge=1, le=100)
+    include_total: bool = Field(default=False, description="Also count every matching row (slower)")
+
+
+def _split_order(order_by: Sequence[Any]) -> List[tuple[ColumnElement, bool]]:
+    """Turns `[Model.a, Model.b.desc()]` into `[(a, False), (b, True)]`."""
+    keys = []
+    for clause in order_by:
+        if isinstance(clause, UnaryExpression) and clause.modifier in (operators.desc_op, operators.asc_op):
+            keys.append((clause.element, clause.modifier is operators.desc_op))
+        else:
+            keys.append((clause.expression, False))
+    return keys
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def _decode_value(column: ColumnElement, value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type in (uuid.UUID, Decimal):
+        return python_type(value)
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: List[tuple[ColumnElement, bool]]) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("cursor does not match the sort keys")
+        return [_decode_value(column, value) for (column, _), value in zip(keys, values)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor() from e
+
+
+def _order(keys: List[tuple[ColumnElement, bool]]) -> List[ColumnElement]:
+    """
+    Spells out Postgres' default NULL placement, where NULL sorts as the largest value (last
+    ascending, first descending), so `_after` agrees with it and indexes still serve the order.
+    """
+    return [column.desc().nulls_first() if descending else column.asc().nulls_last() for column, descending in keys]
+
+
+def _equal(column: ColumnElement, value: Any) -> ColumnElement:
+    return column.is_(None) if value is None else column == value
+
+
+def _past(column: ColumnElement, descending: bool, value: Any) -> ColumnElement:
+    """Rows whose `column` sorts strictly after `value`, NULL being larger than any value."""
+    if descending:
+        return column.is_not(None) if value is None else column < value
+    return false() if value is None else or_(column > value, column.is_(None))
+
+
+def _after(keys: List[tuple[ColumnElement, bool]], values: List[Any]) -> ColumnElement:
+    """
+    Builds the keyset predicate "row sorts after `values`" for any mix of ascending and descending
+    keys: (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..., with NULLs placed as in `_order`.
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal_prefix = [_equal(keys[j][0], values[j]) for j in range(i)]
+        clauses.append(and_(*equal_prefix, _past(column, descending, values[i])))
+    return or_(*clauses) if clauses else false()
+
+
+async def cursor_paginate(
+    session: AsyncSession, statement, order_by: Sequence[Any], params: CursorParams, schema: Type[T]
+) -> CursorPage[T]:
+    """
+    Pages through `statement` with keyset pagination over `order_by`, which must end with a unique,
+    non-null column (usually the primary key) so every row has a distinct position; NULLs in the
+    other columns sort as the largest value. The
+    cursor encodes the sort key of the last row, so deep pages cost the same as the first one;
+    the total is only counted when asked for.
+    """
+    keys = _split_order(order_by)
+
+    total = None
+    if params.include_total:
+        count_statement = select(func.count()).select_from(statement.order_by(None).subquery())
+        total = (await session.exec(count_statement)).one()
+
+    page_statement = statement.order_by(None).order_by(*_order(keys))
+    if params.cursor:
+        page_statement = page_statement.where(_after(keys, decode_cursor(params.cursor, keys)))
+
+    db_result = await session.exec(page_statement.limit(params.size + 1))
+    rows = db_result.all()
+
+    next_cursor = None
+    if len(rows) > params.size:
+        rows = rows[:params.size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column, _ in keys])
+
+    items = [schema.model_validate(row, from_attributes=True) for row in rows]
+    return CursorPage[schema](items=items, size=params.size, next_cursor=next_cursor, total=total)
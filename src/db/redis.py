@@ -1,24 +1,41 @@
+import asyncio
+import time
 from typing import Optional
 import uuid
 import redis.asyncio as aioredis
+from redis.exceptions import WatchError
 from src.config.settings import (
+    Config,
     broker_url,
 )
+from src.db.blocklist import JtiBlocklistMirror
+from src.utils.cache import LRUCache
 from src.utils.logger import LOGGER
 
 # Redis connection pool settings
-REDIS_POOL_SIZE = 10
-REDIS_TIMEOUT = 5
+REDIS_POOL_SIZE = Config.REDIS_POOL_SIZE
+REDIS_TIMEOUT = Config.REDIS_SOCKET_TIMEOUT
 JTI_EXPIRY = 3600
 VERIFICATION_CODE_EXPIRY = 900  # 15 minutes
 SECURITY_EXPIRY = 2592000  # 1 month
+BLOCKLIST_KEY = "jti_blocklist"
+BLOCKLIST_CHANNEL = "jti_blocklist:revoked"
+BLOCKLIST_PRUNE_INTERVAL = 60
+PRINCIPAL_CHANNEL = "principals:invalidated"
 
 # Initialize Redis with connection pooling
-redis_pool = aioredis.ConnectionPool.from_url(
-    broker_url, max_connections=REDIS_POOL_SIZE, socket_timeout=REDIS_TIMEOUT
+redis_pool = aioredis.BlockingConnectionPool.from_url(
+    broker_url,
+    max_connections=REDIS_POOL_SIZE,
+    timeout=Config.REDIS_POOL_TIMEOUT,
+    socket_timeout=REDIS_TIMEOUT,
+    socket_connect_timeout=Config.REDIS_CONNECT_TIMEOUT,
+    health_check_interval=Config.REDIS_HEALTH_CHECK_INTERVAL,
 )
 redis_client = aioredis.Redis(connection_pool=redis_pool)
 
+jti_mirror = JtiBlocklistMirror(capacity=Config.JTI_BLOOM_CAPACITY)
+
 
 # Password Reset Code
 async def store_password_reset_code(
@@ -35,10 +52,11 @@ async def store_new_ip(
 async def store_allowed_ip(
     user_id: uuid.UUID, new_ip: str
 ):
-    banned_ip = await redis_client.get(f"new_ip:{user_id}:{new_ip}")
-    if banned_ip:
-        delete_ip_security(user_id,new_ip)
-    await redis_client.set(f"allowed:{user_id}:{new_ip}", new_ip, ex=None)
+    """Marks an IP as allowed and clears its pending security entry in one transaction."""
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(f"new_ip:{user_id}:{new_ip}")
+        pipe.set(f"allowed:{user_id}:{new_ip}", new_ip, ex=None)
+        await pipe.execute()
 
 async def delete_ip_security(
     user_id: uuid.UUID, new_ip: str
@@ -50,6 +68,90 @@ async def delete_allowed_ip(
 ):
     await redis_client.delete(f"allowed:{user_id}:{new_ip}")
 
+# IP trust index
+def _allowed_ips_key(user_id: uuid.UUID) -> str:
+    return f"ips:allowed:{user_id}"
+
+
+def _banned_ips_key(user_id: uuid.UUID) -> str:
+    return f"ips:banned:{user_id}"
+
+
+def _indexed_ips_key(user_id: uuid.UUID) -> str:
+    return f"ips:indexed:{user_id}"
+
+
+def _ip_index_version_key(user_id: uuid.UUID) -> str:
+    return f"ips:version:{user_id}"
+
+
+async def get_ip_index_versions(user_ids: list[uuid.UUID]) -> dict[uuid.UUID, int]:
+    """The index version of each user, to be read before their IPs are loaded from the database."""
+    values = await redis_client.mget([_ip_index_version_key(user_id) for user_id in user_ids])
+    return {user_id: int(value or 0) for user_id, value in zip(user_ids, values)}
+
+
+async def index_user_ips(
+    users_ips: dict[uuid.UUID, tuple[list[str], list[str]]], versions: dict[uuid.UUID, int]
+) -> None:
+    """
+    Replaces the allowed/banned IP sets of each user with the given `(allowed, banned)` lists and marks
+    them as complete, in a single MULTI/EXEC so a concurrent login never sees a set between the
+    DELETE and the SADD. `versions` are the index versions read before the lists were loaded: users
+    whose IPs changed since then are skipped, and a change racing the transaction (WATCH) aborts it,
+    so a stale snapshot never replaces newer state.
+    """
+    if not users_ips:
+        return
+    version_keys = [_ip_index_version_key(user_id) for user_id in users_ips]
+    async with redis_client.pipeline(transaction=True) as pipe:
+        await pipe.watch(*version_keys)
+        current = await pipe.mget(version_keys)
+        pipe.multi()
+        for (user_id, (allowed, banned)), version in zip(users_ips.items(), current):
+            if int(version or 0) != versions[user_id]:
+                continue
+            pipe.delete(_allowed_ips_key(user_id), _banned_ips_key(user_id))
+            if allowed:
+                pipe.sadd(_allowed_ips_key(user_id), *allowed)
+                pipe.expire(_allowed_ips_key(user_id), Config.IP_INDEX_TTL)
+            if banned:
+                pipe.sadd(_banned_ips_key(user_id), *banned)
+                pipe.expire(_banned_ips_key(user_id), Config.IP_INDEX_TTL)
+            pipe.set(_indexed_ips_key(user_id), 1, ex=Config.IP_INDEX_TTL)
+        try:
+            await pipe.execute()
+        except WatchError:
+            LOGGER.debug("IP index changed while it was being rebuilt, leaving it to the next lookup")
+
+
+async def unindex_user_ips(user_id: uuid.UUID) -> None:
+    """Drops a user's index after their IPs change; the next login rebuilds it from the database."""
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.incr(_ip_index_version_key(user_id))
+        pipe.expire(_ip_index_version_key(user_id), SECURITY_EXPIRY)
+        pipe.delete(_allowed_ips_key(user_id), _banned_ips_key(user_id), _indexed_ips_key(user_id))
+        await pipe.execute()
+
+
+async def get_ip_trust(user_id: uuid.UUID, ip: str) -> tuple[Optional[tuple[bool, bool]], int]:
+    """
+    Returns `(known, banned)` for an IP with one pipelined call, or `None` when the user's IPs have not
+    been indexed yet and the database has to be asked instead, together with the index version to
+    pass to `index_user_ips` once they have been read.
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.exists(_indexed_ips_key(user_id))
+        pipe.sismember(_allowed_ips_key(user_id), ip)
+        pipe.sismember(_banned_ips_key(user_id), ip)
+        pipe.get(_ip_index_version_key(user_id))
+        indexed, known, banned, version = await pipe.execute()
+
+    if not indexed:
+        return None, int(version or 0)
+    return (bool(known), bool(banned)), int(version or 0)
+
+
 # Get the reset code from Redis
 async def get_password_reset_code(user_id: uuid.UUID) -> Optional[str]:
     return await redis_client.get(f"reset_code:{user_id}")
@@ -58,10 +160,10 @@ async def get_password_reset_code(user_id: uuid.UUID) -> Optional[str]:
 # Email Verification Code
 async def store_verification_code(user_id: uuid.UUID, code: str) -> None:
     """Stores the verification code in Redis with an expiry time."""
-    await redis_client.hset(
-        f"verification_code:{user_id}", mapping={"code": code, "verified": "false"}
-    )
-    await redis_client.expire(f"verification_code:{user_id}", VERIFICATION_CODE_EXPIRY)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(f"verification_code:{user_id}", mapping={"code": code, "verified": "false"})
+        pipe.expire(f"verification_code:{user_id}", VERIFICATION_CODE_EXPIRY)
+        await pipe.execute()
 
 
 async def get_verification_status(user_id: uuid.UUID) -> dict:
@@ -77,14 +179,95 @@ async def mark_email_verified(user_id: uuid.UUID) -> None:
 
 # Blacklisting
 async def add_jti_to_blocklist(jti: str) -> None:
-    """Adds a JTI (JWT ID) to the Redis blocklist with an expiry."""
-    # Use the 'set' command with an expiry to add the JTI to the blocklist
-    await redis_client.set(jti, "", ex=JTI_EXPIRY)
+    """Adds a JTI (JWT ID) to the Redis blocklist with an expiry and broadcasts it to every worker."""
+    now = time.time()
+    expires_at = now + JTI_EXPIRY
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.set(jti, "", ex=JTI_EXPIRY)
+        pipe.zadd(BLOCKLIST_KEY, {jti: expires_at})
+        pipe.zremrangebyscore(BLOCKLIST_KEY, "-inf", now)
+        pipe.publish(BLOCKLIST_CHANNEL, f"{expires_at}:{jti}")
+        await pipe.execute()
+    jti_mirror.add(jti, expires_at)
 
 
 async def token_in_blocklist(jti: str) -> bool:
-    """Checks if a JTI (JWT ID) is in the Redis blocklist."""
+    """
+    Checks if a JTI (JWT ID) is in the blocklist. The local mirror answers directly and Redis is only
+    asked when the bloom filter reports a possible hit the exact set cannot confirm, or while the
+    mirror is not in sync.
+    """
+    if jti_mirror.ready:
+        if not jti_mirror.might_contain(jti):
+            return False
+        if jti_mirror.contains(jti):
+            return True
+
     # Use 'exists' instead of 'get' for better performance
     is_blocked = await redis_client.exists(jti)
     LOGGER.debug(f"Token is locked: {is_blocked == 1}")
     return is_blocked == 1
+
+
+async def sync_jti_blocklist() -> None:
+    """
+    Seeds the local JTI mirror from Redis and keeps it current from the revocation channel. Runs for the
+    lifetime of the worker; on connection errors the mirror is marked stale (falling back to Redis on
+    every check) until it has resubscribed and reloaded.
+    """
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(BLOCKLIST_CHANNEL)
+            entries = await redis_client.zrangebyscore(BLOCKLIST_KEY, time.time(), "+inf", withscores=True)
+            jti_mirror.load((jti.decode("utf-8"), expires_at) for jti, expires_at in entries)
+            jti_mirror.ready = True
+            LOGGER.info(f"JTI blocklist mirror loaded with {len(jti_mirror)} entries")
+
+            last_pruned = time.monotonic()
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=BLOCKLIST_PRUNE_INTERVAL)
+                if message is not None:
+                    expires_at, _, jti = message["data"].decode("utf-8").partition(":")
+                    jti_mirror.add(jti, float(expires_at))
+
+                if time.monotonic() - last_pruned >= BLOCKLIST_PRUNE_INTERVAL:
+                    jti_mirror.prune()
+                    last_pruned = time.monotonic()
+        except asyncio.CancelledError:
+            jti_mirror.ready = False
+            raise
+        except Exception as e:
+            jti_mirror.ready = False
+            LOGGER.exception(f"JTI blocklist sync failed: {e}")
+            await asyncio.sleep(REDIS_TIMEOUT)
+        finally:
+            await pubsub.aclose()
+
+
+async def publish_principal_invalidation(user_id: uuid.UUID) -> None:
+    await redis_client.publish(PRINCIPAL_CHANNEL, str(user_id))
+
+
+async def sync_principal_invalidations(cache: LRUCache) -> None:
+    """
+    Drops principals from this worker's cache when any worker announces a change to that user. Runs for
+    the lifetime of the worker; invalidations may be missed while disconnected, so the whole cache is
+    cleared every time the subscription is (re)established.
+    """
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(PRINCIPAL_CHANNEL)
+            cache.clear()
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=BLOCKLIST_PRUNE_INTERVAL)
+                if message is not None:
+                    cache.invalidate(uuid.UUID(message["data"].decode("utf-8")))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            LOGGER.exception(f"Principal invalidation sync failed: {e}")
+            await asyncio.sleep(REDIS_TIMEOUT)
+        finally:
+            await pubsub.aclose()
@@ -201,6 +201,34 @@ class FormDataRequired(NextStocksException):
     pass
 
 
+class HashingOverloaded(NextStocksException):
+    """Too many password hashes are already queued on this worker."""
+    pass
+
+
+class TooManyAttempts(NextStocksException):
+    """Too many login or signup attempts from this ip address or for this email."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
+class InvalidCursor(NextStocksException):
+    """The pagination cursor is malformed or belongs to a different listing."""
+    pass
+
+
+class AnalyticsBackpressure(NextStocksException):
+    """The analytics buffer is full because the consumers are falling behind."""
+    pass
+
+
+class ExportFormatUnavailable(NextStocksException):
+    """The export format needs an optional dependency that is not installed."""
+    pass
+
+
 # Exception handler generator
 def create_exception_handler(
     status_code: int, initial_detail: Any
@@ -424,3 +452,57 @@ def register_all_errors(app: FastAPI):
             status_code=status.HTTP_401_UNAUTHORIZED,
             content={"message": "Password is incorrect", "error_code": "incorrect_password"}
         )
+
+    @app.exception_handler(HashingOverloaded)
+    async def HashingOverloadedError(request: Request, exc: HashingOverloaded):
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"message": "Server is busy, please try again shortly.", "error_code": "hashing_overloaded"},
+            headers={"Retry-After": "1"},
+        )
+
+    @app.exception_handler(TooManyAttempts)
+    async def TooManyAttemptsError(request: Request, exc: TooManyAttempts):
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={
+                "message": f"Too many attempts, please try again in {exc.retry_after} seconds.",
+                "error_code": "too_many_attempts",
+            },
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    @app.exception_handler(InvalidCursor)
+    async def InvalidCursorError(request: Request, exc: InvalidCursor):
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"message": "Invalid pagination cursor", "error_code": "invalid_cursor"}
+        )
+
+    @app.exception_handler(AnalyticsBackpressure)
+    async def AnalyticsBackpressureError(request: Request, exc: AnalyticsBackpressure):
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={
+                "message": "Analytics are temporarily not being accepted, please retry shortly.",
+                "error_code": "analytics_backpressure",
+            },
+            headers={"Retry-After": "5"},
+        )
+
+    @app.exception_handler(AnalysisDataUnavailable)
+    async def AnalysisDataUnavailableError(request: Request, exc: AnalysisDataUnavailable):
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"message": "Analytics data does not exist", "error_code": "analytics_not_found"}
+        )
+
+    @app.exception_handler(ExportFormatUnavailable)
+    async def ExportFormatUnavailableError(request: Request, exc: ExportFormatUnavailable):
+        return JSONResponse(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            content={
+                "message": "This export format is not available on this server",
+                "error_code": "export_format_unavailable",
+            },
+        )
@@ -6,6 +6,8 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 import time
 import logging
 
+from src.db.db import MUTATING_METHODS, mark_client_wrote, replica_engine
+from src.db.instrumentation import UNMATCHED_ROUTE, finish_request, start_request
 from src.utils.logger import LOGGER
 
 logger = logging.getLogger("uvicorn.access")
@@ -38,6 +40,25 @@ def register_middleware(app: FastAPI):
         LOGGER.info(message)
         return response
 
+    @app.middleware("http")
+    async def query_instrumentation(request: Request, call_next):
+        queries = start_request()
+        response = await call_next(request)
+
+        route = request.scope.get("route")
+        finish_request(f"{request.method} {route.path}" if route else UNMATCHED_ROUTE, queries)
+        response.headers["X-DB-Query-Count"] = str(queries.count)
+        response.headers["X-DB-Time-Ms"] = f"{queries.time_ms:.1f}"
+        return response
+
+    if replica_engine is not None:
+        @app.middleware("http")
+        async def read_your_writes(request: Request, call_next):
+            response = await call_next(request)
+            if request.method in MUTATING_METHODS and response.status_code < 400:
+                await mark_client_wrote(request)
+            return response
+
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -1,5 +1,9 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+import os
 import random
+import time
 import uuid
 from itsdangerous import URLSafeTimedSerializer
 import jwt  # type: ignore
@@ -7,10 +11,47 @@ import jwt  # type: ignore
 from passlib.context import CryptContext
 from pydantic import EmailStr  # type: ignore
 from src.config.settings import Config
+from src.errors import HashingOverloaded
+from src.utils.cache import LRUCache
 from src.utils.logger import LOGGER
+from src.utils.metrics import Histogram
 
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated='auto')
+def build_password_context(
+    schemes: list[str],
+    bcrypt_rounds: int,
+    argon2_time_cost: int,
+    argon2_memory_cost: int,
+    argon2_parallelism: int,
+) -> CryptContext:
+    """
+    Builds the password `CryptContext`. The first scheme hashes new passwords; every other scheme (and
+    any hash whose cost differs from the configured one) is reported by `needs_update` so it can be
+    rehashed on the next successful login. bcrypt is always accepted, since every existing password
+    was hashed with it; when it is not configured it is verify-only.
+    """
+    if "bcrypt" not in schemes:
+        schemes = [*schemes, "bcrypt"]
+    settings = {"bcrypt__rounds": bcrypt_rounds, "bcrypt__min_rounds": bcrypt_rounds}
+    if "argon2" in schemes:
+        settings.update(
+            argon2__time_cost=argon2_time_cost,
+            argon2__memory_cost=argon2_memory_cost,
+            argon2__parallelism=argon2_parallelism,
+        )
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
+
+
+bcrypt_context = build_password_context(
+    schemes=Config.PASSWORD_HASH_SCHEMES,
+    bcrypt_rounds=Config.BCRYPT_ROUNDS,
+    argon2_time_cost=Config.ARGON2_TIME_COST,
+    argon2_memory_cost=Config.ARGON2_MEMORY_COST,
+    argon2_parallelism=Config.ARGON2_PARALLELISM,
+)
+
+# Tokens whose signature has already been checked, keyed by the signature segment
+token_cache: LRUCache[tuple[str, dict]] = LRUCache(maxsize=Config.TOKEN_CACHE_SIZE)
 
 
 def generateHashKey(word: str) -> str:
@@ -44,6 +85,101 @@ def verifyHashKey(word: str, hash: str) -> bool:
     correct = bcrypt_context.verify(word, hash)
     return correct
 
+def verifyAndUpdateHashKey(word: str, hash: str) -> tuple[bool, str | None]:
+    """
+    The function `verifyAndUpdateHashKey` verifies a word against a hash and, when the hash was made
+    with a deprecated scheme or cost, also returns a replacement hash made with the current settings.
+
+    :param word: The plaintext password to verify
+    :type word: str
+    :param hash: The stored password hash
+    :type hash: str
+    :return: A `(valid, new_hash)` tuple where `new_hash` is `None` unless the stored hash is out of date.
+    """
+    return bcrypt_context.verify_and_update(word, hash)
+
+class PasswordHasher:
+    """
+    Runs `generateHashKey` / `verifyHashKey` in a bounded process pool so bcrypt never blocks the
+    event loop. At most `max_concurrency` hashes run at once and at most `max_queue` callers may wait
+    for a slot; anyone beyond that is rejected straight away with `HashingOverloaded`.
+    """
+
+    def __init__(self, workers: int, max_concurrency: int, max_queue: int):
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.waiting = 0
+        self.running = 0
+        self.rejected = 0
+        self.queue_latency = Histogram()
+        self.hash_latency = Histogram()
+        self._executor: ProcessPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._executor
+
+    async def _run(self, fn, *args):
+        executor = self._get_executor()
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise HashingOverloaded()
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        self.queue_latency.observe((started_at - queued_at) * 1000)
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+            self.hash_latency.observe((time.perf_counter() - started_at) * 1000)
+
+    async def hash(self, word: str) -> str:
+        return await self._run(generateHashKey, word)
+
+    async def verify(self, word: str, hash: str) -> bool:
+        return await self._run(verifyHashKey, word, hash)
+
+    async def verify_and_update(self, word: str, hash: str) -> tuple[bool, str | None]:
+        return await self._run(verifyAndUpdateHashKey, word, hash)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "queue_latency": self.queue_latency.snapshot(),
+            "hash_latency": self.hash_latency.snapshot(),
+        }
+
+
+_hash_workers = Config.HASH_POOL_WORKERS or os.cpu_count() or 1
+password_hasher = PasswordHasher(
+    workers=_hash_workers,
+    max_concurrency=Config.HASH_MAX_CONCURRENCY or _hash_workers,
+    max_queue=Config.HASH_MAX_QUEUE,
+)
+
 serializer = URLSafeTimedSerializer(
     secret_key=Config.SECRET_KEY, salt="email-configuration"
 )
@@ -142,6 +278,25 @@ def decode_token(token: str) -> dict:
         LOGGER.exception(e)
         return None
 
+def verify_token(token: str) -> dict:
+    """
+    The function `verify_token` decodes a JWT token once and remembers the verified claims until the
+    token expires, so repeated requests carrying the same token skip the signature check.
+
+    :param token: The encoded JWT token sent in the `Authorization` header
+    :type token: str
+    :return: The decoded claims when the token is valid, otherwise `None`.
+    """
+    signature = token.rpartition(".")[2]
+    cached = token_cache.get(signature)
+    if cached is not None and cached[0] == token:
+        return cached[1]
+
+    token_data = decode_token(token)
+    if token_data is not None:
+        token_cache.set(signature, (token, token_data), expires_at=token_data.get("exp"))
+    return token_data
+
 def generate_verification_code() -> str:
     """
     The function generates a random 6-digit verification code for a given email address.
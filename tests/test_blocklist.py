@@ -0,0 +1,92 @@
+import time
+
+from src.db.blocklist import BloomFilter, JtiBlocklistMirror
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000)
+    items = [f"jti-{n}" for n in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+
+
+def test_bloom_filter_false_positive_rate_stays_near_target():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for n in range(1000):
+        bloom.add(f"jti-{n}")
+
+    false_positives = sum(f"other-{n}" in bloom for n in range(10000))
+    assert false_positives / 10000 < 0.03
+
+
+def test_bloom_filter_starts_empty():
+    bloom = BloomFilter(capacity=10)
+    assert "anything" not in bloom
+
+
+def test_mirror_confirms_added_jti():
+    mirror = JtiBlocklistMirror(capacity=100)
+    mirror.add("revoked", time.time() + 60)
+
+    assert mirror.might_contain("revoked")
+    assert mirror.contains("revoked")
+    assert not mirror.contains("unknown")
+    assert len(mirror) == 1
+
+
+def test_mirror_ignores_already_expired_jti():
+    mirror = JtiBlocklistMirror(capacity=100)
+    mirror.add("stale", time.time() - 1)
+
+    assert not mirror.contains("stale")
+    assert len(mirror) == 0
+
+
+def test_mirror_stops_confirming_once_expired(monkeypatch):
+    mirror = JtiBlocklistMirror(capacity=100)
+    now = time.time()
+    mirror.add("revoked", now + 10)
+
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert not mirror.contains("revoked")
+
+
+def test_mirror_prune_drops_expired_entries_from_the_bloom_filter(monkeypatch):
+    mirror = JtiBlocklistMirror(capacity=100)
+    now = time.time()
+    mirror.add("short", now + 10)
+    mirror.add("long", now + 1000)
+
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    mirror.prune()
+
+    assert len(mirror) == 1
+    assert not mirror.might_contain("short")
+    assert mirror.contains("long")
+
+
+def test_mirror_load_replaces_previous_entries():
+    mirror = JtiBlocklistMirror(capacity=100)
+    expires_at = time.time() + 60
+    mirror.add("old", expires_at)
+
+    mirror.load([("a", expires_at), ("b", expires_at)])
+
+    assert not mirror.might_contain("old")
+    assert mirror.contains("a") and mirror.contains("b")
+    assert len(mirror) == 2
+
+
+def test_mirror_prunes_itself_when_over_capacity(monkeypatch):
+    mirror = JtiBlocklistMirror(capacity=2)
+    now = time.time()
+    mirror.add("a", now + 10)
+    mirror.add("b", now + 10)
+
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    mirror.add("c", now + 100)
+
+    assert len(mirror) == 1
+    assert mirror.contains("c")
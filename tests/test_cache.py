@@ -0,0 +1,91 @@
+import time
+
+from src.utils.cache import LRUCache
+
+
+def test_get_returns_default_on_miss():
+    cache = LRUCache(maxsize=2)
+
+    assert cache.get("missing") is None
+    assert cache.get("missing", "fallback") == "fallback"
+    assert cache.misses == 2
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_overwriting_a_key_does_not_evict():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+
+    assert len(cache) == 2
+    assert cache.get("a") == 10
+    assert cache.evictions == 0
+
+
+def test_default_ttl_expires_entries(monkeypatch):
+    cache = LRUCache(maxsize=2, ttl=10)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.set("a", 1)
+
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_explicit_expiry_overrides_ttl(monkeypatch):
+    cache = LRUCache(maxsize=2, ttl=10)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.set("a", 1, expires_at=now + 100)
+
+    monkeypatch.setattr(time, "time", lambda: now + 50)
+    assert cache.get("a") == 1
+
+
+def test_entries_without_ttl_never_expire(monkeypatch):
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+
+    monkeypatch.setattr(time, "time", lambda: 2 ** 40)
+    assert cache.get("a") == 1
+
+
+def test_invalidate_and_clear():
+    cache = LRUCache(maxsize=4)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.invalidate("a")
+    cache.invalidate("unknown")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_stats():
+    cache = LRUCache(maxsize=4)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    stats = cache.stats()
+    assert stats["size"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from src.apps.analytics.counters import range_keys
+from src.config.settings import Config
+
+
+def key(grain: str, stamp: str) -> str:
+    return f"{grain}:{stamp}"
+
+
+@pytest.fixture(autouse=True)
+def hourly_ttl(monkeypatch):
+    monkeypatch.setattr(Config, "ANALYTICS_COUNTERS_HOURLY_TTL_DAYS", 8)
+
+
+def test_empty_range():
+    moment = datetime(2024, 1, 1, 12)
+
+    assert range_keys(key, moment, moment, moment) == []
+
+
+def test_hours_within_a_day():
+    keys = range_keys(key, datetime(2024, 1, 1, 10), datetime(2024, 1, 1, 13), datetime(2024, 1, 2))
+
+    assert keys == ["h:2024010110", "h:2024010111", "h:2024010112"]
+
+
+def test_start_is_floored_to_the_hour():
+    keys = range_keys(key, datetime(2024, 1, 1, 10, 45), datetime(2024, 1, 1, 12), datetime(2024, 1, 2))
+
+    assert keys == ["h:2024010110", "h:2024010111"]
+
+
+def test_whole_days_use_daily_buckets_and_edges_use_hourly_ones():
+    keys = range_keys(key, datetime(2024, 1, 1, 22), datetime(2024, 1, 4, 2), datetime(2024, 1, 4, 3))
+
+    assert keys == [
+        "h:2024010122",
+        "h:2024010123",
+        "d:20240102",
+        "d:20240103",
+        "h:2024010400",
+        "h:2024010401",
+    ]
+
+
+def test_exact_days():
+    keys = range_keys(key, datetime(2024, 1, 1), datetime(2024, 1, 3), datetime(2024, 1, 4))
+
+    assert keys == ["d:20240101", "d:20240102"]
+
+
+def test_edges_past_the_hourly_retention_fall_back_to_their_day():
+    keys = range_keys(key, datetime(2024, 1, 1, 22), datetime(2024, 1, 2, 2), datetime(2024, 1, 20))
+
+    assert keys == ["d:20240101", "d:20240102"]
+
+
+def test_only_the_expired_edge_falls_back():
+    # By Jan 10 the hourly buckets of Jan 1 have expired, those of Jan 9 have not
+    keys = range_keys(key, datetime(2024, 1, 1, 22), datetime(2024, 1, 9, 2), datetime(2024, 1, 10))
+
+    assert keys[0] == "d:20240101"
+    assert keys[-2:] == ["h:2024010900", "h:2024010901"]
+    assert keys[1:-2] == [f"d:2024010{day}" for day in range(2, 9)]
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.apps.analytics.services import event_time
+from src.config.settings import Config
+
+NOW = datetime(2024, 6, 1, 12)
+
+
+@pytest.fixture(autouse=True)
+def bounds(monkeypatch):
+    monkeypatch.setattr(Config, "ANALYTICS_EVENT_MAX_AGE_SECONDS", 86400)
+    monkeypatch.setattr(Config, "ANALYTICS_EVENT_MAX_SKEW_SECONDS", 300)
+
+
+def test_missing_time_is_now():
+    assert event_time(None, NOW) == NOW
+
+
+def test_recent_time_is_kept():
+    moment = NOW - timedelta(hours=3)
+
+    assert event_time(moment, NOW) == moment
+
+
+def test_aware_time_becomes_naive_utc():
+    moment = datetime(2024, 6, 1, 14, tzinfo=timezone(timedelta(hours=2)))
+
+    assert event_time(moment, NOW) == NOW
+
+
+def test_old_time_is_clamped_to_the_max_age():
+    assert event_time(datetime(2001, 1, 1), NOW) == NOW - timedelta(days=1)
+
+
+def test_future_time_is_clamped_to_the_max_skew():
+    assert event_time(NOW + timedelta(days=30), NOW) == NOW + timedelta(minutes=5)
+
+
+def test_bounds_are_inclusive():
+    assert event_time(NOW - timedelta(days=1), NOW) == NOW - timedelta(days=1)
+    assert event_time(NOW + timedelta(minutes=5), NOW) == NOW + timedelta(minutes=5)
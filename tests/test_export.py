@@ -0,0 +1,90 @@
+import asyncio
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from src.apps.analytics.export import EXPORT_COLUMNS, _csv, _ndjson, _parquet
+
+
+def make_row(n: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        uid=uuid.UUID(int=n),
+        date=datetime(2024, 1, 1, 12, n),
+        ip=f"10.0.0.{n}",
+        timeSpentInSeconds=n * 10,
+        analyticsUid=uuid.UUID(int=1000 + n),
+        pathname=f"/page/{n}",
+        domain="https://example.com",
+    )
+
+
+CHUNKS = [[make_row(1), make_row(2)], [make_row(3)], [make_row(4), make_row(5), make_row(6)]]
+
+
+async def _chunks(chunks):
+    for rows in chunks:
+        yield rows
+
+
+async def _collect(stream):
+    return [data async for data in stream]
+
+
+def test_ndjson_writes_one_object_per_line():
+    lines = _ndjson(CHUNKS[0]).decode().splitlines()
+
+    assert [json.loads(line) for line in lines] == [
+        {
+            "uid": str(uuid.UUID(int=n)),
+            "date": datetime(2024, 1, 1, 12, n).isoformat(),
+            "ip": f"10.0.0.{n}",
+            "timeSpentInSeconds": n * 10,
+            "analyticsUid": str(uuid.UUID(int=1000 + n)),
+            "pathname": f"/page/{n}",
+            "domain": "https://example.com",
+        }
+        for n in (1, 2)
+    ]
+
+
+def test_csv_chunks_concatenate_into_one_document():
+    data = _csv([], header=True) + b"".join(_csv(rows, header=False) for rows in CHUNKS)
+    rows = list(csv.reader(io.StringIO(data.decode())))
+
+    assert rows[0] == EXPORT_COLUMNS
+    assert [row[0] for row in rows[1:]] == [str(uuid.UUID(int=n)) for n in range(1, 7)]
+
+
+def test_parquet_streams_one_row_group_per_chunk():
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    parts = asyncio.run(_collect(_parquet(_chunks(CHUNKS))))
+
+    # Every chunk is sent as soon as it is written, then the footer
+    assert len(parts) == len(CHUNKS) + 1
+    assert all(parts[:-1])
+    parquet_file = pyarrow.parquet.ParquetFile(pyarrow.BufferReader(b"".join(parts)))
+    assert parquet_file.metadata.num_row_groups == len(CHUNKS)
+
+    table = parquet_file.read()
+    assert table.column_names == EXPORT_COLUMNS
+    assert table.column("uid").to_pylist() == [str(uuid.UUID(int=n)) for n in range(1, 7)]
+    assert table.column("date").to_pylist() == [datetime(2024, 1, 1, 12, n) for n in range(1, 7)]
+    assert table.column("timeSpentInSeconds").to_pylist() == [n * 10 for n in range(1, 7)]
+
+
+def test_parquet_of_nothing_is_a_valid_empty_file():
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    data = b"".join(asyncio.run(_collect(_parquet(_chunks([])))))
+
+    table = pyarrow.parquet.read_table(pyarrow.BufferReader(data))
+    assert table.num_rows == 0
+    assert table.column_names == EXPORT_COLUMNS
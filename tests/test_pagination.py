@@ -0,0 +1,122 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, insert, select
+
+from src.db.pagination import _after, _order, _split_order, decode_cursor, encode_cursor
+from src.errors import InvalidCursor
+
+metadata = MetaData()
+items = Table(
+    "items",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=True),
+    Column("createdAt", DateTime, nullable=True),
+)
+
+BASE = datetime(2024, 1, 1)
+ROWS = [
+    {"id": 1, "name": "b", "createdAt": BASE},
+    {"id": 2, "name": "a", "createdAt": BASE},
+    {"id": 3, "name": None, "createdAt": BASE + timedelta(days=1)},
+    {"id": 4, "name": "a", "createdAt": None},
+    {"id": 5, "name": None, "createdAt": None},
+    {"id": 6, "name": "c", "createdAt": BASE + timedelta(days=2)},
+    {"id": 7, "name": "b", "createdAt": None},
+    {"id": 8, "name": None, "createdAt": BASE},
+]
+
+
+@pytest.fixture(scope="module")
+def connection():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        metadata.create_all(connection)
+        connection.execute(insert(items), ROWS)
+        yield connection
+
+
+def _walk(connection, order_by, size):
+    """Every id in page order, passing the cursor through its string form like the API does."""
+    keys = _split_order(order_by)
+    statement = select(items).order_by(*_order(keys))
+    seen, cursor = [], None
+    while True:
+        page_statement = statement
+        if cursor is not None:
+            page_statement = statement.where(_after(keys, decode_cursor(cursor, keys)))
+        rows = connection.execute(page_statement.limit(size)).all()
+        if not rows:
+            return seen
+        seen.extend(row.id for row in rows)
+        cursor = encode_cursor([getattr(rows[-1], column.key) for column, _ in keys])
+
+
+def _sort_key(value):
+    # NULL sorts as the largest value, as in Postgres
+    return (value is None, value)
+
+
+@pytest.mark.parametrize(
+    "order_by, expected_keys",
+    [
+        ([items.c.createdAt, items.c.id], [("createdAt", False), ("id", False)]),
+        ([items.c.createdAt.desc(), items.c.id.desc()], [("createdAt", True), ("id", True)]),
+        (
+            [items.c.name, items.c.createdAt.desc(), items.c.id],
+            [("name", False), ("createdAt", True), ("id", False)],
+        ),
+        (
+            [items.c.name.desc(), items.c.createdAt, items.c.id.desc()],
+            [("name", True), ("createdAt", False), ("id", True)],
+        ),
+    ],
+)
+@pytest.mark.parametrize("size", [1, 2, 3, 10])
+def test_pages_cover_every_row_once_in_order(connection, order_by, expected_keys, size):
+    expected = [row["id"] for row in ROWS]
+    for name, descending in reversed(expected_keys):
+        expected.sort(
+            key=lambda uid: _sort_key(next(r[name] for r in ROWS if r["id"] == uid)),
+            reverse=descending,
+        )
+
+    assert _walk(connection, order_by, size) == expected
+
+
+def test_split_order_reads_directions():
+    keys = _split_order([items.c.name, items.c.createdAt.desc(), items.c.id.asc()])
+
+    assert [(column.key, descending) for column, descending in keys] == [
+        ("name", False),
+        ("createdAt", True),
+        ("id", False),
+    ]
+
+
+def test_cursor_round_trip():
+    keys = _split_order([items.c.createdAt.desc(), items.c.name, items.c.id])
+    values = [datetime(2024, 1, 1, 12, 30, 15, 123456), None, 42]
+
+    cursor = encode_cursor(values)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, keys) == values
+
+
+def test_cursor_encodes_uuids_as_strings():
+    value = uuid.uuid4()
+
+    assert encode_cursor([value]) == encode_cursor([str(value)])
+
+
+@pytest.mark.parametrize(
+    "cursor", ["not a cursor!", "", encode_cursor([1]), encode_cursor({"a": 1}), encode_cursor(["x", 1])]
+)
+def test_decode_rejects_malformed_cursors(cursor):
+    keys = _split_order([items.c.createdAt, items.c.id])
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, keys)
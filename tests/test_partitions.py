@@ -0,0 +1,53 @@
+from datetime import date
+
+import pytest
+
+from src.apps.analytics.partitions import (
+    _MONTH_SUFFIX,
+    add_months,
+    default_partition_ddl,
+    initial_partition_ddl,
+    partition_ddl,
+    partition_name,
+)
+
+
+@pytest.mark.parametrize(
+    "month, months, expected",
+    [
+        (date(2024, 1, 1), 0, date(2024, 1, 1)),
+        (date(2024, 1, 1), 1, date(2024, 2, 1)),
+        (date(2024, 11, 1), 3, date(2025, 2, 1)),
+        (date(2024, 12, 1), 1, date(2025, 1, 1)),
+        (date(2024, 1, 1), -1, date(2023, 12, 1)),
+        (date(2024, 3, 1), -15, date(2022, 12, 1)),
+    ],
+)
+def test_add_months(month, months, expected):
+    assert add_months(month, months) == expected
+
+
+def test_partition_name_round_trips_through_the_suffix_pattern():
+    name = partition_name("page_views", date(2024, 3, 1))
+
+    assert name == "page_views_2024_03"
+    assert _MONTH_SUFFIX.search(name).groups() == ("2024", "03")
+    assert _MONTH_SUFFIX.search("page_views_default") is None
+
+
+def test_partition_ddl_covers_one_month():
+    assert partition_ddl("buttons_clicked", date(2024, 12, 1)) == (
+        "CREATE TABLE IF NOT EXISTS buttons_clicked_2024_12 PARTITION OF buttons_clicked "
+        "FOR VALUES FROM ('2024-12-01') TO ('2025-01-01')"
+    )
+
+
+def test_initial_partitions_start_with_the_default_one():
+    statements = initial_partition_ddl("page_views", 2, today=date(2024, 12, 15))
+
+    assert statements == [
+        default_partition_ddl("page_views"),
+        partition_ddl("page_views", date(2024, 12, 1)),
+        partition_ddl("page_views", date(2025, 1, 1)),
+        partition_ddl("page_views", date(2025, 2, 1)),
+    ]
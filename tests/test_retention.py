@@ -0,0 +1,43 @@
+from datetime import date
+
+import pytest
+
+from src.apps.analytics.retention import longest_retention_days, partition_drop_cutoff, retention_days
+from src.config.settings import Config
+
+
+@pytest.fixture
+def policies(monkeypatch):
+    def configure(default, per_domain):
+        monkeypatch.setattr(Config, "ANALYTICS_RETENTION_DAYS", default)
+        monkeypatch.setattr(Config, "ANALYTICS_RETENTION_POLICIES", per_domain)
+    return configure
+
+
+def test_domain_policy_overrides_the_default(policies):
+    policies(90, {"https://a.example": 30})
+
+    assert retention_days("https://a.example") == 30
+    assert retention_days("https://b.example") == 90
+
+
+def test_nothing_expires_by_default(policies):
+    policies(None, {})
+
+    assert longest_retention_days() is None
+    assert partition_drop_cutoff(date(2024, 6, 1)) is None
+
+
+def test_longest_policy_wins(policies):
+    policies(90, {"https://a.example": 30, "https://b.example": 400})
+
+    assert longest_retention_days() == 400
+    assert partition_drop_cutoff(date(2024, 6, 1)) == date(2023, 4, 28)
+
+
+@pytest.mark.parametrize("forever", [None, 0])
+def test_any_domain_kept_forever_blocks_partition_drops(policies, forever):
+    policies(90, {"https://a.example": 30, "https://b.example": forever})
+
+    assert longest_retention_days() is None
+    assert partition_drop_cutoff(date(2024, 6, 1)) is None
@@ -0,0 +1,64 @@
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from src.utils import uuid7 as uuid7_module
+from src.utils.uuid7 import uuid7, uuid7_floor
+
+
+def test_version_and_variant_bits():
+    value = uuid7()
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert str(value)[14] == "7"
+
+
+def test_embeds_the_current_millisecond():
+    before = time.time_ns() // 1_000_000
+    value = uuid7()
+    after = time.time_ns() // 1_000_000
+
+    assert before <= value.int >> 80 <= after + 1
+
+
+def test_strictly_increasing_within_a_process():
+    values = [uuid7() for _ in range(10000)]
+
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+
+
+def test_strictly_increasing_when_the_clock_steps_back(monkeypatch):
+    first = uuid7()
+    monkeypatch.setattr(time, "time_ns", lambda: ((first.int >> 80) - 1000) * 1_000_000)
+
+    second = uuid7()
+    assert first < second < uuid7()
+
+
+def test_counter_overflow_moves_to_the_next_millisecond(monkeypatch):
+    now_ms = time.time_ns() // 1_000_000
+    monkeypatch.setattr(time, "time_ns", lambda: now_ms * 1_000_000)
+    monkeypatch.setattr(uuid7_module, "_last_ms", now_ms)
+    monkeypatch.setattr(uuid7_module, "_counter", 0xFFF)
+
+    value = uuid7()
+
+    assert value.int >> 80 == now_ms + 1
+    assert (value.int >> 64) & 0xFFF == 0
+
+
+def test_floor_sorts_before_every_uuid7_of_that_millisecond():
+    moment = datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc)
+    floor = uuid7_floor(moment)
+
+    assert floor.int >> 80 == int(moment.timestamp() * 1000)
+    assert floor.int & ((1 << 80) - 1) == 0
+    assert uuid7_floor(moment - timedelta(milliseconds=1)) < floor < uuid7()
+
+
+def test_floor_takes_naive_datetimes_as_utc():
+    aware = datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc)
+
+    assert uuid7_floor(aware.replace(tzinfo=None)) == uuid7_floor(aware)